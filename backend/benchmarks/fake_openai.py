@@ -0,0 +1,173 @@
+"""OpenAI-compatible stand-in for chat completions and embeddings.
+
+Replies are canned and embeddings are derived from a hash of the input, so
+runs are repeatable and cost nothing. Latency is ``--latency-ms`` plus up to
+``--jitter-ms`` of uniform noise per request; streamed replies are paced at
+``--tokens-per-second``.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+CHAT_LATENCY_MS = float(os.getenv("FAKE_OPENAI_CHAT_LATENCY_MS", "300"))
+EMBEDDING_LATENCY_MS = float(os.getenv("FAKE_OPENAI_EMBEDDING_LATENCY_MS", "50"))
+JITTER_MS = float(os.getenv("FAKE_OPENAI_JITTER_MS", "50"))
+TOKENS_PER_SECOND = float(os.getenv("FAKE_OPENAI_TOKENS_PER_SECOND", "200"))
+EMBEDDING_SIZE = int(os.getenv("FAKE_OPENAI_EMBEDDING_SIZE", "1536"))
+
+REPLY = (
+    "A standard tune-up starts from $59 and covers brake and gear adjustment, "
+    "a drivetrain clean and a safety check. If you would like us to come to "
+    "you, book a slot here: https://bikehero.sg/goifnmnf"
+)
+
+app = FastAPI(title="Fake OpenAI")
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str
+    messages: List[Dict[str, Any]]
+    stream: bool = False
+    stream_options: Optional[Dict[str, Any]] = None
+
+
+class EmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str], List[int], List[List[int]]]
+    encoding_format: Optional[str] = None
+
+
+def count_tokens(text: str) -> int:
+    return max(1, (len(text) + 3) // 4)
+
+
+async def simulate_latency(base_ms: float):
+    delay = base_ms + random.uniform(0, JITTER_MS)
+    await asyncio.sleep(delay / 1000)
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """Unit vector seeded by the text, identical across runs"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_SIZE)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def usage_for(request: ChatCompletionRequest) -> Dict[str, int]:
+    prompt_tokens = sum(
+        count_tokens(str(message.get("content", ""))) for message in request.messages
+    )
+    completion_tokens = count_tokens(REPLY)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+async def stream_chunks(request: ChatCompletionRequest, completion_id: str):
+    def chunk(delta, finish_reason=None, usage=None):
+        body = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": (
+                [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                if delta is not None
+                else []
+            ),
+        }
+        if usage is not None:
+            body["usage"] = usage
+        return f"data: {json.dumps(body)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    words = REPLY.split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(1 / TOKENS_PER_SECOND)
+        yield chunk({"content": word if i == 0 else f" {word}"})
+    yield chunk({}, finish_reason="stop")
+    if (request.stream_options or {}).get("include_usage"):
+        yield chunk(None, usage=usage_for(request))
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    await simulate_latency(CHAT_LATENCY_MS)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if request.stream:
+        return StreamingResponse(
+            stream_chunks(request, completion_id), media_type="text/event-stream"
+        )
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": REPLY},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": usage_for(request),
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: EmbeddingRequest):
+    await simulate_latency(EMBEDDING_LATENCY_MS)
+    inputs = request.input
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    data = []
+    for index, item in enumerate(inputs):
+        vector = fake_embedding(item if isinstance(item, str) else str(item))
+        if request.encoding_format == "base64":
+            embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": index, "embedding": embedding})
+    prompt_tokens = sum(count_tokens(str(item)) for item in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": request.model,
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--chat-latency-ms", type=float, default=CHAT_LATENCY_MS)
+    parser.add_argument(
+        "--embedding-latency-ms", type=float, default=EMBEDDING_LATENCY_MS
+    )
+    parser.add_argument("--jitter-ms", type=float, default=JITTER_MS)
+    parser.add_argument("--tokens-per-second", type=float, default=TOKENS_PER_SECOND)
+    args = parser.parse_args()
+
+    CHAT_LATENCY_MS = args.chat_latency_ms
+    EMBEDDING_LATENCY_MS = args.embedding_latency_ms
+    JITTER_MS = args.jitter_ms
+    TOKENS_PER_SECOND = args.tokens_per_second
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,140 @@
+"""Closed-loop load generator for the chat and history endpoints.
+
+``--concurrency`` workers send requests back to back until ``--requests``
+have completed per endpoint; latency percentiles and throughput are written
+as JSON. Point the backend at ``fake_openai.py`` (``OPENAI_BASE_URL``) or run
+it with ``LLM_PROVIDER=fake`` to keep runs offline.
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+import httpx
+from loguru import logger
+
+from backend.benchmarks.results import summarize_latencies, write_results
+
+MESSAGES = [
+    "How much is a standard tune-up?",
+    "What does the premium package include?",
+    "Can you replace my brake pads and how much?",
+    "Do you service e-bikes?",
+    "My gears keep slipping, what should I book?",
+    "How much to fix a flat tire?",
+]
+
+
+def chat_request(unique: bool) -> Callable[[int], Dict[str, Any]]:
+    messages = itertools.cycle(MESSAGES)
+
+    def build(i: int) -> Dict[str, Any]:
+        message = next(messages)
+        if unique:
+            # Defeats the response cache and request coalescing
+            message = f"{message} (#{i})"
+        return {"method": "POST", "url": "/chat/", "json": {"message": message}}
+
+    return build
+
+
+def history_request(limit: int) -> Callable[[int], Dict[str, Any]]:
+    def build(i: int) -> Dict[str, Any]:
+        return {"method": "GET", "url": "/chat/history/", "params": {"limit": limit}}
+
+    return build
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    build: Callable[[int], Dict[str, Any]],
+    total: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    counter = itertools.count()
+    latencies = []
+    status_codes = Counter()
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < total:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**build(i))
+                status_codes[str(response.status_code)] += 1
+                if response.is_success:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.HTTPError as e:
+                errors += 1
+                status_codes[type(e).__name__] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": total,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+        "status_codes": dict(status_codes),
+    }
+
+
+async def main(args):
+    endpoints = {
+        "chat": chat_request(args.unique_messages),
+        "history": history_request(args.history_limit),
+    }
+    selected = list(endpoints) if args.endpoint == "all" else [args.endpoint]
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        for name in selected:
+            if args.warmup:
+                await run_endpoint(
+                    client, endpoints[name], args.warmup, args.concurrency
+                )
+            logger.info(
+                f"{name}: {args.requests} requests at concurrency {args.concurrency}"
+            )
+            results[name] = await run_endpoint(
+                client, endpoints[name], args.requests, args.concurrency
+            )
+            logger.info(f"{name}: {results[name]['rps']} rps")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat API load generator")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["chat", "history", "all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per endpoint"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=10, help="Unmeasured requests per endpoint"
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--history-limit", type=int, default=50)
+    parser.add_argument(
+        "--unique-messages",
+        action="store_true",
+        help="Make every chat message distinct so caching doesn't flatter results",
+    )
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    write_results("load_test", vars(args), results, args.output)
@@ -0,0 +1,111 @@
+"""Micro-benchmarks for the retrieval path of ``VectorDBManager``.
+
+Runs in-process against a throwaway embedding cache and vector store. The
+default ``--provider fake`` uses deterministic local embeddings; pass
+``--openai-base-url`` to embed through ``fake_openai.py`` (or any compatible
+server) and include the HTTP round trip.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+from loguru import logger
+
+from backend.benchmarks.results import summarize_latencies, write_results
+
+QUERIES = [
+    "How much is a standard tune-up?",
+    "brake pad replacement price",
+    "what is included in the premium package",
+    "do you come to my home",
+]
+
+
+def measure(fn: Callable[[int], Any], iterations: int) -> Dict[str, Any]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return {"iterations": iterations, "latency_ms": summarize_latencies(samples)}
+
+
+def run(args, work_dir: str) -> Dict[str, Any]:
+    # Imported late so the environment set in __main__ is picked up
+    from backend.src.utils.pricing import DEFAULT_PRICING_DATA
+    from backend.src.utils.vector_db import VectorDBManager
+
+    def new_manager(name: str) -> VectorDBManager:
+        return VectorDBManager(
+            persist_directory=os.path.join(work_dir, name),
+            backend=args.vector_backend,
+        )
+
+    results = {}
+    manager = new_manager("documents")
+    results["create_documents_from_pricing_data"] = measure(
+        lambda i: manager.create_documents_from_pricing_data(DEFAULT_PRICING_DATA),
+        args.iterations,
+    )
+
+    # Empty embedding cache and store: every chunk is embedded
+    results["initialize_vectorstore_cold"] = measure(
+        lambda i: new_manager("cold").initialize_vectorstore(), 1
+    )
+    # Fresh store, warm embedding cache: what a restart costs
+    results["initialize_vectorstore_warm_cache"] = measure(
+        lambda i: new_manager(f"warm-{i}").initialize_vectorstore(),
+        args.init_iterations,
+    )
+    # Same pricing version again: the live store is resynced and the diff
+    # finds nothing to do
+    manager.initialize_vectorstore()
+    results["initialize_vectorstore_resync"] = measure(
+        lambda i: manager.initialize_vectorstore(), args.init_iterations
+    )
+
+    results["search_relevant_context"] = measure(
+        lambda i: manager.search_relevant_context(QUERIES[i % len(QUERIES)], k=args.k),
+        args.iterations,
+    )
+    manager.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector DB micro-benchmarks")
+    parser.add_argument("--provider", choices=["fake", "openai"], default="fake")
+    parser.add_argument(
+        "--openai-base-url", help="OpenAI-compatible server, e.g. fake_openai.py"
+    )
+    parser.add_argument(
+        "--embedding-backend", choices=["openai", "local"], default="openai"
+    )
+    parser.add_argument(
+        "--vector-backend", choices=["numpy", "chroma"], default="numpy"
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--init-iterations", type=int, default=10)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+        os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(work_dir, "embedding_cache")
+        os.environ.pop("VECTOR_SNAPSHOT_DIR", None)
+        if args.openai_base_url:
+            os.environ["OPENAI_BASE_URL"] = args.openai_base_url
+            os.environ.setdefault("OPENAI_API_KEY", "bench")
+            args.provider = "openai"
+        os.environ["LLM_PROVIDER"] = args.provider
+        os.environ["EMBEDDING_BACKEND"] = args.embedding_backend
+        results = run(args, work_dir)
+
+    write_results("micro", vars(args), results, args.output)
@@ -0,0 +1,60 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+
+def summarize_latencies(samples_s: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds"""
+    if not samples_s:
+        return {}
+    samples_ms = np.asarray(samples_s) * 1000
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "min": round(float(samples_ms.min()), 3),
+        "mean": round(float(samples_ms.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(samples_ms.max()), 3),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(
+    benchmark: str,
+    config: Dict[str, Any],
+    results: Dict[str, Any],
+    output: Optional[str],
+):
+    """Write a run as JSON (to ``output`` or stdout) so runs can be compared"""
+    report = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        logger.info(f"Results written to {output}")
+    else:
+        print(text)
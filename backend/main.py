@@ -1,3 +1,9 @@
+import time
+
+# Taken before the other imports so the startup report includes them
+BOOT_STARTED = time.perf_counter()
+
+import asyncio
 import json
 import os
 from contextlib import asynccontextmanager
@@ -6,28 +12,146 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from backend.src.apis import agent_router, chat_router, health_router
+from backend.src.apis import (
+    agent_router,
+    chat_router,
+    health_router,
+    metrics_router,
+)
+from backend.src.db.agent_cache import AgentCache
+from backend.src.db.database import AsyncSessionLocal, dispose_engines, engine
+from backend.src.db.history_archiver import HISTORY_RETENTION_DAYS, HistoryArchiver
+from backend.src.db.history_writer import HistoryWriter
+from backend.src.db.migrations import upgrade_database
+from backend.src.db.pricing_sync import PricingSync
+from backend.src.utils.admission import create_rate_limiter
+from backend.src.utils.startup import StartupReport
+
+IMPORTS_FINISHED = time.perf_counter()
+
+# Write openapi.json on startup (off by default; it rewrites a tracked file)
+EXPORT_OPENAPI = os.getenv("EXPORT_OPENAPI", "false").lower() == "true"
+# Warm the agent after the server starts accepting connections; /ready gates traffic
+BACKGROUND_WARM_UP = os.getenv("BACKGROUND_WARM_UP", "true").lower() == "true"
+# Warm-up attempts before the process reports itself dead, and the first retry delay (doubles)
+WARM_UP_MAX_ATTEMPTS = int(os.getenv("WARM_UP_MAX_ATTEMPTS", "5"))
+WARM_UP_RETRY_SECONDS = float(os.getenv("WARM_UP_RETRY_SECONDS", "2"))
+# How often each worker checks the database for a newer pricing version
+PRICING_POLL_SECONDS = float(os.getenv("PRICING_POLL_SECONDS", "2"))
+
+
+def create_ai_agent():
+    """Import and build the agent; runs in a worker thread, as both are slow"""
+    from backend.src.utils.ai_agent import AIAgent
+
+    return AIAgent()
+
+
+async def warm_up_agent(app: FastAPI):
+    """Build and warm the shared agent, then mark the process ready.
+
+    Failed attempts are retried with exponential backoff. Once
+    WARM_UP_MAX_ATTEMPTS have failed the startup report is marked failed,
+    which also fails the liveness probe so the process gets restarted.
+    """
+    report = app.state.startup_report
+    ai_agent = None
+    for attempt in range(1, WARM_UP_MAX_ATTEMPTS + 1):
+        try:
+            if ai_agent is None:
+                with report.phase("agent_init"):
+                    ai_agent = await asyncio.to_thread(create_ai_agent)
+            with report.phase("vector_store_warm_up"):
+                await asyncio.to_thread(ai_agent.warm_up)
+            # Catch up with pricing pushed to other workers, then keep polling
+            with report.phase("pricing_sync"):
+                pricing_sync = PricingSync(AsyncSessionLocal, PRICING_POLL_SECONDS)
+                await pricing_sync.start(ai_agent)
+            break
+        except Exception as e:
+            if attempt == WARM_UP_MAX_ATTEMPTS:
+                logger.exception(f"AI agent warm-up failed after {attempt} attempts")
+                report.mark_failed(str(e))
+                return
+            delay = WARM_UP_RETRY_SECONDS * 2 ** (attempt - 1)
+            logger.warning(
+                f"AI agent warm-up attempt {attempt} failed ({e}); retrying in {delay}s"
+            )
+            report.record_retry(str(e))
+            await asyncio.sleep(delay)
+    app.state.pricing_sync = pricing_sync
+    app.state.ai_agent = ai_agent
+    app.state.ready = True
+    report.mark_ready()
+
+
+def export_openapi(app: FastAPI, path: str = "openapi.json"):
+    with open(path, "w") as f:
+        json.dump(app.openapi(), f, indent=2)
+    logger.info(f"OpenAPI schema exported to {os.path.abspath(path)}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup events
     logger.info("Starting up application...")
-
-    # Export OpenAPI schema to file on startup
-    logger.info("Exporting OpenAPI schema...")
-    openapi_schema = app.openapi()
-
-    # Save to project root
-    with open("openapi.json", "w") as f:
-        json.dump(openapi_schema, f, indent=2)
-
-    logger.info(f"OpenAPI schema exported to {os.path.abspath('openapi.json')}")
-
+    report = StartupReport(BOOT_STARTED)
+    report.record("imports", IMPORTS_FINISHED - BOOT_STARTED)
+    app.state.startup_report = report
+    app.state.ready = False
+    app.state.ai_agent = None
+    app.state.pricing_sync = None
+
+    # Per-client token buckets for the chat routes (None when not configured)
+    app.state.rate_limiter = create_rate_limiter()
+
+    # Columns and indexes added since the database was created; a no-op once applied
+    with report.phase("schema_upgrade"):
+        await upgrade_database(engine)
+
+    # Chat history is written behind the response path in batches
+    with report.phase("history_writer"):
+        app.state.agent_cache = AgentCache()
+        app.state.history_writer = HistoryWriter(AsyncSessionLocal)
+        app.state.history_writer.start()
+
+    # Old chat history moves to compressed day files on a schedule, if enabled
+    app.state.history_archiver = None
+    if HISTORY_RETENTION_DAYS:
+        app.state.history_archiver = HistoryArchiver(
+            AsyncSessionLocal, engine, retention_days=float(HISTORY_RETENTION_DAYS)
+        )
+        app.state.history_archiver.start()
+
+    if EXPORT_OPENAPI:
+        with report.phase("openapi_export"):
+            export_openapi(app)
+
+    # One shared agent (and vector store) per process, warmed once. Requests
+    # that arrive before it is ready wait for it in get_ai_agent.
+    app.state.warm_up_task = asyncio.create_task(warm_up_agent(app))
+    if not BACKGROUND_WARM_UP:
+        await app.state.warm_up_task
+    report.record("lifespan_startup", time.perf_counter() - report.started_at)
     yield
 
     # Shutdown events
     logger.info("Shutting down application...")
+    app.state.ready = False
+    # A warm-up still retrying, or stuck on an upstream call, mustn't hold up shutdown
+    app.state.warm_up_task.cancel()
+    try:
+        await app.state.warm_up_task
+    except asyncio.CancelledError:
+        pass
+    await app.state.history_writer.stop()
+    if app.state.history_archiver is not None:
+        await app.state.history_archiver.stop()
+    if app.state.pricing_sync is not None:
+        await app.state.pricing_sync.stop()
+    if app.state.ai_agent is not None:
+        app.state.ai_agent.close()
+    await dispose_engines()
 
 
 # Create FastAPI app
@@ -44,25 +168,47 @@ app.add_middleware(
 
 # Include API routers
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(chat_router)
 app.include_router(agent_router)
 
 
 if __name__ == "__main__":
-    import asyncio
-    import os
+    import argparse
 
     import uvicorn
 
     from backend.scripts.init_db import create_tables
 
-    # Check if database file exists
-    db_path = "ai_agent.db"
-    if not os.path.exists(db_path):
-        logger.info("Database file not found. Creating tables...")
-        asyncio.run(create_tables())
-        logger.info("Database tables created successfully.")
-    else:
-        logger.info("Database file already exists.")
-
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Run the AI Agent Service")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="Worker processes, e.g. one per core (default: WEB_CONCURRENCY or 1)",
+    )
+    args = parser.parse_args()
+
+    # Embedded Chroma can't be shared by several processes; the numpy backend
+    # keeps each worker's index in memory over a shared snapshot directory
+    if args.workers > 1 and os.getenv("VECTOR_BACKEND", "chroma") == "chroma":
+        logger.warning(
+            "VECTOR_BACKEND=chroma doesn't support several worker processes; "
+            "using VECTOR_BACKEND=numpy"
+        )
+        os.environ["VECTOR_BACKEND"] = "numpy"
+        os.environ.setdefault("VECTOR_SNAPSHOT_DIR", "./vector_snapshot")
+
+    # Once, before the workers start; existing tables are upgraded in place
+    asyncio.run(create_tables())
+
+    # Each worker builds its own agent and follows pricing updates through the
+    # database (PricingSync). Caches and /metrics counters are per worker.
+    uvicorn.run(
+        "backend.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
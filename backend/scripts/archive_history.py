@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date
+
+from loguru import logger
+
+from backend.src.db.database import AsyncSessionLocal, dispose_engines, engine
+from backend.src.db.history_archiver import (
+    HISTORY_ARCHIVE_BATCH_SIZE,
+    HISTORY_ARCHIVE_DIR,
+    HISTORY_RETENTION_DAYS,
+    HistoryArchiver,
+    read_archive,
+)
+
+
+async def archive(args):
+    """Archive chat history past the retention period, then vacuum."""
+    archiver = HistoryArchiver(
+        AsyncSessionLocal,
+        engine,
+        archive_dir=args.archive_dir,
+        retention_days=args.older_than_days,
+        batch_size=args.batch_size,
+    )
+    try:
+        if args.action == "enable-incremental-vacuum":
+            await archiver.enable_incremental_vacuum()
+        else:
+            await archiver.archive_once()
+    finally:
+        await dispose_engines()
+
+
+def read(args):
+    """Write archived rows to stdout as JSON lines."""
+    since = date.fromisoformat(args.since) if args.since else None
+    until = date.fromisoformat(args.until) if args.until else None
+    for record in read_archive(args.archive_dir, since, until):
+        sys.stdout.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat history retention utility")
+    parser.add_argument(
+        "--action",
+        choices=["archive", "read", "enable-incremental-vacuum"],
+        default="archive",
+        help="Action to perform (default: archive)",
+    )
+    parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=float(HISTORY_RETENTION_DAYS or 30),
+        help="Archive rows older than this (default: HISTORY_RETENTION_DAYS or 30)",
+    )
+    parser.add_argument("--archive-dir", default=HISTORY_ARCHIVE_DIR)
+    parser.add_argument("--batch-size", type=int, default=HISTORY_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--since", help="First day to read (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to read (YYYY-MM-DD)")
+
+    args = parser.parse_args()
+    if args.action == "read":
+        read(args)
+    else:
+        logger.info(f"Using database {engine.url.render_as_string(hide_password=True)}")
+        asyncio.run(archive(args))
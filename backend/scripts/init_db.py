@@ -4,13 +4,15 @@ import asyncio
 from loguru import logger
 
 from backend.src.db.database import engine
+from backend.src.db.migrations import upgrade_schema
 from backend.src.models.models import Base
 
 
 async def create_tables():
-    """Create all tables in the database."""
+    """Create all tables in the database, and upgrade existing ones."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
     logger.info("Database tables created successfully.")
 
 
@@ -38,6 +40,7 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+    logger.info(f"Using database {engine.url.render_as_string(hide_password=True)}")
 
     if args.action == "create":
         asyncio.run(create_tables())
@@ -1,5 +1,6 @@
 from .agent import router as agent_router
 from .chat import router as chat_router
 from .health import router as health_router
+from .metrics import router as metrics_router
 
-__all__ = ["chat_router", "agent_router", "health_router"]
+__all__ = ["chat_router", "agent_router", "health_router", "metrics_router"]
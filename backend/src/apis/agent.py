@@ -1,14 +1,62 @@
-from fastapi import APIRouter
+from typing import TYPE_CHECKING, Optional
 
-from backend.src.utils.ai_agent import AIAgent
+from fastapi import APIRouter, Depends, HTTPException
 
-router = APIRouter(prefix="/agent", tags=["agent"])
+from backend.src.apis.dependencies import (
+    get_ai_agent,
+    get_history_archiver,
+    get_history_writer,
+    get_pricing_sync,
+    get_rate_limiter,
+)
+from backend.src.db.history_archiver import HistoryArchiver
+from backend.src.db.history_writer import HistoryWriter
+from backend.src.db.pricing_sync import PricingSync
+from backend.src.utils.admission import ClientRateLimiter
+from backend.src.utils.pricing import InvalidPricingData
+
+if TYPE_CHECKING:
+    from backend.src.utils.ai_agent import AIAgent
 
-# Initialize AI Agent
-ai_agent = AIAgent()
+router = APIRouter(prefix="/agent", tags=["agent"])
 
 
 @router.post("/pricing/")
-async def update_pricing_context(pricing_data: dict):
-    ai_agent.set_pricing_context(pricing_data)
-    return {"message": "Pricing context updated successfully"}
+async def update_pricing_context(
+    pricing_data: dict, pricing_sync: PricingSync = Depends(get_pricing_sync)
+):
+    """Store a new pricing version, build and swap in its search index, and report the build.
+
+    Other workers pick the version up on their next poll. A malformed payload
+    is rejected with 422 and never stored.
+    """
+    try:
+        version = await pricing_sync.publish(pricing_data)
+    except InvalidPricingData as e:
+        raise HTTPException(status_code=422, detail=f"Invalid pricing data: {e}")
+    return {"message": "Pricing context updated successfully", **version}
+
+
+@router.get("/stats/")
+async def get_agent_stats(
+    ai_agent: "AIAgent" = Depends(get_ai_agent),
+    history_writer: HistoryWriter = Depends(get_history_writer),
+    pricing_sync: PricingSync = Depends(get_pricing_sync),
+    rate_limiter: Optional[ClientRateLimiter] = Depends(get_rate_limiter),
+    history_archiver: Optional[HistoryArchiver] = Depends(get_history_archiver),
+):
+    """Pricing sync, admission, cache, request coalescing, upstream resilience and history writer/archiver counters for this worker"""
+    return {
+        "pricing_version": ai_agent.pricing_version,
+        "pricing_sync": pricing_sync.stats(),
+        "admission": ai_agent.admission.stats(),
+        "rate_limiter": rate_limiter.stats() if rate_limiter else None,
+        "response_cache": ai_agent.response_cache.stats(),
+        "single_flight": ai_agent.single_flight.stats(),
+        "resilience": {
+            "llm": ai_agent.llm_guard.stats(),
+            "embeddings": ai_agent.vector_db.embedding_guard.stats(),
+        },
+        "history_writer": history_writer.stats(),
+        "history_archiver": history_archiver.stats() if history_archiver else None,
+    }
@@ -1,61 +1,412 @@
-from typing import List
+import asyncio
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from loguru import logger
+from sqlalchemy import insert, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from backend.src.db.database import get_db
-from backend.src.models.models import Agent
+from backend.src.apis.dependencies import (
+    enforce_rate_limit,
+    get_agent_cache,
+    get_ai_agent,
+    get_history_writer,
+)
+from backend.src.db.agent_cache import AgentCache
+from backend.src.db.database import ReadOnlySessionLocal, get_db, get_read_db
+from backend.src.db.history_writer import HistoryWriter
 from backend.src.models.models import ChatHistory as ChatHistoryModel
-from backend.src.schemas.schemas import ChatHistory, ChatMessage, ChatResponse
-from backend.src.utils.ai_agent import AIAgent
+from backend.src.schemas.schemas import (
+    ChatBatchRequest,
+    ChatBatchResponse,
+    ChatHistory,
+    ChatHistoryPage,
+    ChatMessage,
+    ChatResponse,
+)
+from backend.src.utils.admission import AdmissionRejected
+from backend.src.utils.metrics import record_response, stage, track_request
+
+if TYPE_CHECKING:
+    from backend.src.utils.ai_agent import AIAgent
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-# Initialize AI Agent
-ai_agent = AIAgent()
+EXPORT_BATCH_SIZE = 500
+# Most recent turns loaded as conversation memory (then fitted to the token budget)
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "10"))
+# Reply to requests shed under overload with "429" or a "human_transfer" response
+OVERLOAD_RESPONSE = os.getenv("OVERLOAD_RESPONSE", "429")
+# Largest accepted POST /chat/batch, and how many of its messages run at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
 
+def build_history_row(
+    message: ChatMessage, response: Dict[str, Any], conversation_id: str
+):
+    """Chat history row values for a processed message"""
+    return {
+        "agent_id": message.agent_id,
+        "conversation_id": conversation_id,
+        "message": message.message,
+        "response": response["response"],
+        "metadata_info": response["metadata_info"],
+        "requires_human": bool(response["metadata_info"].get("requires_human")),
+    }
 
-@router.post("/", response_model=ChatResponse)
-async def chat(message: ChatMessage, db: AsyncSession = Depends(get_db)):
-    # For demo purposes, we'll use a default agent (ID 1)
-    agent = await db.scalar(select(Agent).where(Agent.id == message.agent_id))
 
-    if not agent:
-        # Create default agent if it doesn't exist
-        agent = Agent(
-            id=1,
-            name="BikeHero Assistant",
-            description="AI assistant for bike maintenance services",
+async def load_recent_turns(
+    db: AsyncSession, history_writer: HistoryWriter, conversation_id: str
+) -> List[Dict[str, str]]:
+    """Most recent turns of a conversation, oldest first, as role/content entries"""
+    # Rows still waiting in the write-behind queue are part of the conversation
+    # too. Taken before the query, so a row committed in between is in one or
+    # both of the two, never neither
+    pending = history_writer.pending_rows(conversation_id)
+    result = await db.execute(
+        select(
+            ChatHistoryModel.message,
+            ChatHistoryModel.response,
+            ChatHistoryModel.created_at,
         )
-        db.add(agent)
-        await db.commit()
-        await db.refresh(agent)
-
-    # Process message with AI agent
-    response = await ai_agent.process_message(message.message)
-
-    logger.info(f"Message: {message}")
-    logger.info(f"Response: {response}")
-
-    # Save chat history using the SQLAlchemy model
-    chat_history = ChatHistoryModel(
-        agent_id=message.agent_id,
-        message=message.message,
-        response=response["response"],
-        metadata_info=response["metadata_info"],
+        .where(ChatHistoryModel.conversation_id == conversation_id)
+        .order_by(ChatHistoryModel.created_at.desc(), ChatHistoryModel.id.desc())
+        .limit(HISTORY_MAX_TURNS)
     )
-    db.add(chat_history)
-    await db.commit()
+    turns = {(row.created_at, row.message, row.response) for row in result}
+    turns.update(
+        (row["created_at"], row["message"], row["response"]) for row in pending
+    )
+    turns = sorted(turns, key=lambda turn: turn[0])[-HISTORY_MAX_TURNS:]
+
+    chat_history = []
+    for _, user_message, response in turns:
+        chat_history.append({"role": "user", "content": user_message})
+        chat_history.append({"role": "assistant", "content": response})
+    return chat_history
+
+
+def batch_item_status(response: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """(status, error) of a batch item from its envelope, as process_message
+    answers most failures with a fallback reply instead of raising"""
+    metadata = response.get("metadata_info") or {}
+    if metadata.get("overloaded"):
+        return "rejected", "overloaded"
+    if metadata.get("circuit_open"):
+        return "error", "upstream_unavailable"
+    if metadata.get("error"):
+        return "error", metadata["error"]
+    return "ok", None
+
+
+def encode_cursor(row: ChatHistoryModel) -> str:
+    payload = json.dumps([row.created_at.isoformat(), row.id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
 
+def history_query(
+    agent_id: Optional[int] = None,
+    requires_human: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[tuple] = None,
+):
+    """Newest-first history query, continuing after the (created_at, id) key"""
+    query = select(ChatHistoryModel)
+    if agent_id is not None:
+        query = query.where(ChatHistoryModel.agent_id == agent_id)
+    if requires_human is not None:
+        query = query.where(ChatHistoryModel.requires_human == requires_human)
+    if since is not None:
+        query = query.where(ChatHistoryModel.created_at >= since)
+    if until is not None:
+        query = query.where(ChatHistoryModel.created_at < until)
+    if after is not None:
+        query = query.where(
+            tuple_(ChatHistoryModel.created_at, ChatHistoryModel.id) < tuple_(*after)
+        )
+    return query.order_by(
+        ChatHistoryModel.created_at.desc(), ChatHistoryModel.id.desc()
+    )
+
+
+@router.post(
+    "/", response_model=ChatResponse, dependencies=[Depends(enforce_rate_limit)]
+)
+async def chat(
+    message: ChatMessage,
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    ai_agent: "AIAgent" = Depends(get_ai_agent),
+    agent_cache: AgentCache = Depends(get_agent_cache),
+    history_writer: HistoryWriter = Depends(get_history_writer),
+):
+    with track_request("chat") as timer:
+        with stage("agent_lookup"):
+            await agent_cache.ensure(db, message.agent_id)
+
+        # Continue the conversation from its stored turns, or start a new one
+        conversation_id = message.conversation_id or uuid.uuid4().hex
+        chat_history = None
+        if message.conversation_id:
+            with stage("history_load"):
+                chat_history = await load_recent_turns(
+                    read_db, history_writer, conversation_id
+                )
+
+        # Process message with AI agent
+        try:
+            response = await ai_agent.process_message(
+                message.message, chat_history=chat_history
+            )
+        except AdmissionRejected as e:
+            if OVERLOAD_RESPONSE != "human_transfer":
+                raise HTTPException(
+                    status_code=429,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": e.retry_after_header},
+                ) from e
+            response = ai_agent.response_templates.get_overloaded_response()
+        response = {**response, "conversation_id": conversation_id}
+
+        logger.debug(f"Message: {message}")
+        logger.debug(f"Response: {response}")
+
+        # Chat history is persisted in batches by the background writer
+        with stage("history_enqueue"):
+            await history_writer.enqueue(
+                build_history_row(message, response, conversation_id)
+            )
+
+    record_response(response, timer)
     return response
 
 
-@router.get("/history/", response_model=List[ChatHistory])
-async def get_chat_history(db: AsyncSession = Depends(get_db)):
-    """Get all chat history for demo purposes"""
+@router.post("/stream", dependencies=[Depends(enforce_rate_limit)])
+async def chat_stream(
+    message: ChatMessage,
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    ai_agent: "AIAgent" = Depends(get_ai_agent),
+    agent_cache: AgentCache = Depends(get_agent_cache),
+    history_writer: HistoryWriter = Depends(get_history_writer),
+):
+    """Stream the reply as Server-Sent Events: ``token`` events, then one ``done``
+    event with the full response and metadata_info. The chat history row is
+    queued once the stream completes."""
+    with track_request("chat_stream", finish=False) as timer:
+        with stage("agent_lookup"):
+            await agent_cache.ensure(db, message.agent_id)
+
+        conversation_id = message.conversation_id or uuid.uuid4().hex
+        chat_history = None
+        if message.conversation_id:
+            with stage("history_load"):
+                chat_history = await load_recent_turns(
+                    read_db, history_writer, conversation_id
+                )
+
+    async def event_stream():
+        # The body runs after the handler returns; continue the same timer
+        with track_request("chat_stream", timer=timer):
+            response = None
+            async for event in ai_agent.stream_message(
+                message.message, chat_history=chat_history
+            ):
+                if event["event"] == "done":
+                    response = {**event["data"], "conversation_id": conversation_id}
+                    record_response(response, timer)
+                    event = {"event": "done", "data": response}
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+            logger.debug(f"Message: {message}")
+            logger.debug(f"Response: {response}")
+
+            with stage("history_enqueue"):
+                await history_writer.enqueue(
+                    build_history_row(message, response, conversation_id)
+                )
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post(
+    "/batch",
+    response_model=ChatBatchResponse,
+    dependencies=[Depends(enforce_rate_limit)],
+)
+async def chat_batch(
+    batch: ChatBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    ai_agent: "AIAgent" = Depends(get_ai_agent),
+    agent_cache: AgentCache = Depends(get_agent_cache),
+    history_writer: HistoryWriter = Depends(get_history_writer),
+):
+    """Answer many messages in one request, with results in request order.
+
+    Up to ``BATCH_CONCURRENCY`` messages are processed at once; messages of
+    the same conversation run in order, each seeing the replies before it.
+    Identical queries share one retrieval, and every chat history row is
+    written in a single transaction.
+    """
+    if len(batch.messages) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {BATCH_MAX_ITEMS} messages per batch",
+        )
+
+    with track_request("chat_batch"):
+        with stage("agent_lookup"):
+            for agent_id in {message.agent_id for message in batch.messages}:
+                await agent_cache.ensure(db, agent_id)
+
+        # Messages without a conversation each start their own
+        conversations: Dict[str, List[int]] = {}
+        for index, message in enumerate(batch.messages):
+            conversation_id = message.conversation_id or uuid.uuid4().hex
+            conversations.setdefault(conversation_id, []).append(index)
+
+        # Loaded up front, as one session can't serve concurrent queries
+        histories: Dict[str, List[Dict[str, str]]] = {}
+        with stage("history_load"):
+            for conversation_id, indexes in conversations.items():
+                if batch.messages[indexes[0]].conversation_id:
+                    histories[conversation_id] = await load_recent_turns(
+                        read_db, history_writer, conversation_id
+                    )
+
+        items: List[Dict[str, Any]] = [{} for _ in batch.messages]
+        rows: List[Dict[str, Any]] = []
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run_conversation(conversation_id: str, indexes: List[int]):
+            chat_history = histories.get(conversation_id)
+            for index in indexes:
+                message = batch.messages[index]
+                async with semaphore:
+                    try:
+                        response = await ai_agent.process_message(
+                            message.message, chat_history=chat_history
+                        )
+                    except AdmissionRejected as e:
+                        items[index] = {
+                            "index": index,
+                            "status": "rejected",
+                            "error": e.reason,
+                        }
+                        continue
+                    except Exception as e:
+                        logger.exception(f"Batch item {index} failed")
+                        items[index] = {
+                            "index": index,
+                            "status": "error",
+                            "error": str(e),
+                        }
+                        continue
+
+                response = {**response, "conversation_id": conversation_id}
+                record_response(response)
+                status, error = batch_item_status(response)
+                items[index] = {
+                    "index": index,
+                    "status": status,
+                    "response": response,
+                    "error": error,
+                }
+                row = build_history_row(message, response, conversation_id)
+                row["created_at"] = datetime.utcnow()
+                rows.append(row)
+                chat_history = (chat_history or []) + [
+                    {"role": "user", "content": message.message},
+                    {"role": "assistant", "content": response["response"]},
+                ]
+                chat_history = chat_history[-2 * HISTORY_MAX_TURNS :]
+
+        with ai_agent.share_retrievals():
+            await asyncio.gather(
+                *(
+                    run_conversation(conversation_id, indexes)
+                    for conversation_id, indexes in conversations.items()
+                )
+            )
+
+        if rows:
+            with stage("db_write"):
+                await db.execute(insert(ChatHistoryModel), rows)
+                await db.commit()
+
+    succeeded = sum(1 for item in items if item["status"] == "ok")
+    return {
+        "items": items,
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+    }
+
+
+@router.get("/history/", response_model=ChatHistoryPage)
+async def get_chat_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    agent_id: Optional[int] = None,
+    requires_human: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get chat history newest first, one page at a time.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` to fetch the next page.
+    """
+    after = decode_cursor(cursor) if cursor else None
     result = await db.execute(
-        select(ChatHistoryModel).order_by(ChatHistoryModel.created_at.desc())
+        history_query(agent_id, requires_human, since, until, after).limit(limit + 1)
     )
-    return result.scalars().all()
+    rows = result.scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+@router.get("/history/export")
+async def export_chat_history(
+    agent_id: Optional[int] = None,
+    requires_human: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Stream matching chat history as NDJSON, read from the database in batches"""
+
+    async def rows():
+        after = None
+        async with ReadOnlySessionLocal() as session:
+            while True:
+                result = await session.execute(
+                    history_query(agent_id, requires_human, since, until, after).limit(
+                        EXPORT_BATCH_SIZE
+                    )
+                )
+                batch = result.scalars().all()
+                for row in batch:
+                    yield ChatHistory.model_validate(row).model_dump_json() + "\n"
+                if len(batch) < EXPORT_BATCH_SIZE:
+                    break
+                after = (batch[-1].created_at, batch[-1].id)
+                session.expunge_all()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
@@ -0,0 +1,78 @@
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import HTTPException, Request
+
+from backend.src.db.agent_cache import AgentCache
+from backend.src.db.history_archiver import HistoryArchiver
+from backend.src.db.history_writer import HistoryWriter
+from backend.src.db.pricing_sync import PricingSync
+from backend.src.utils.admission import (
+    RATE_LIMIT_TRUSTED_PROXIES,
+    AdmissionRejected,
+    ClientRateLimiter,
+)
+
+if TYPE_CHECKING:
+    from backend.src.utils.ai_agent import AIAgent
+
+
+async def get_ai_agent(request: Request) -> "AIAgent":
+    """Return the process-wide AI agent, waiting for its background warm-up if needed"""
+    state = request.app.state
+    if state.ai_agent is None:
+        await asyncio.shield(state.warm_up_task)
+        if state.ai_agent is None:
+            raise HTTPException(status_code=503, detail="AI agent failed to start")
+    return state.ai_agent
+
+
+def get_agent_cache(request: Request) -> AgentCache:
+    """Return the process-wide cache of known agent IDs"""
+    return request.app.state.agent_cache
+
+
+def get_history_writer(request: Request) -> HistoryWriter:
+    """Return the background chat history writer"""
+    return request.app.state.history_writer
+
+
+def get_history_archiver(request: Request) -> Optional[HistoryArchiver]:
+    """Return the scheduled history archiver, or None when retention is off"""
+    return request.app.state.history_archiver
+
+
+async def get_pricing_sync(request: Request) -> PricingSync:
+    """Return the pricing version sync, which starts once the agent is ready"""
+    await get_ai_agent(request)
+    return request.app.state.pricing_sync
+
+
+def get_rate_limiter(request: Request) -> Optional[ClientRateLimiter]:
+    """Return the per-client rate limiter, or None when rate limiting is off"""
+    return request.app.state.rate_limiter
+
+
+def get_client_id(request: Request) -> str:
+    """Identify the caller by address, or by X-Client-ID when sent by a trusted proxy"""
+    peer = request.client.host if request.client else "unknown"
+    client_id = request.headers.get("x-client-id")
+    # Anyone else could dodge their bucket with a fresh header value per request
+    if client_id and peer in RATE_LIMIT_TRUSTED_PROXIES:
+        return client_id
+    return peer
+
+
+async def enforce_rate_limit(request: Request):
+    """Reject the request with 429 once its client has used up its token bucket"""
+    rate_limiter = get_rate_limiter(request)
+    if rate_limiter is None:
+        return
+    try:
+        rate_limiter.check(get_client_id(request))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": e.retry_after_header},
+        ) from e
@@ -1,8 +1,29 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/")
-async def root():
+async def root(request: Request):
+    """Liveness probe: fails once the AI agent has given up warming up"""
+    report = getattr(request.app.state, "startup_report", None)
+    if report is not None and report.error:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "startup": report.as_dict()},
+        )
     return {"message": "Welcome to AI Agent Service API"}
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    """Readiness probe: passes only once the shared AI agent has been warmed up"""
+    state = request.app.state
+    report = state.startup_report.as_dict() if hasattr(state, "startup_report") else {}
+    if not getattr(state, "ready", False):
+        status = "failed" if report.get("error") else "starting"
+        return JSONResponse(
+            status_code=503, content={"status": status, "startup": report}
+        )
+    return {"status": "ready", "startup": report}
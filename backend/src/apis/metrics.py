@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from backend.src.utils.metrics import HISTORY_QUEUE_DEPTH, RESPONSE_CACHE_ENTRIES
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    """Prometheus metrics for this process"""
+    state = request.app.state
+    if getattr(state, "ai_agent", None) is not None:
+        RESPONSE_CACHE_ENTRIES.set(state.ai_agent.response_cache.stats()["entries"])
+    if getattr(state, "history_writer", None) is not None:
+        HISTORY_QUEUE_DEPTH.set(state.history_writer.queue.qsize())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Set
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.src.models.models import Agent
+
+
+class AgentCache:
+    """In-process set of agent IDs known to exist, so chat requests skip the lookup"""
+
+    def __init__(self):
+        self.known_ids: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    async def ensure(self, db: AsyncSession, agent_id: int):
+        """Make sure the agent exists, creating a demo agent with that ID if needed"""
+        if agent_id in self.known_ids:
+            return
+
+        async with self._lock:
+            if agent_id in self.known_ids:
+                return
+
+            # A no-op when the agent exists, also if another worker just made it
+            name = "BikeHero Assistant"
+            await db.execute(
+                insert(Agent)
+                .prefix_with("OR IGNORE", dialect="sqlite")
+                .values(
+                    id=agent_id,
+                    name=name if agent_id == 1 else f"{name} #{agent_id}",
+                    description="AI assistant for bike maintenance services",
+                )
+            )
+            await db.commit()
+            self.known_ids.add(agent_id)
@@ -1,11 +1,69 @@
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-# SQLite database configuration (async)
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./ai_agent.db"
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True, future=True)
+load_dotenv()
+
+# Database configuration (async), overridable from the environment
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./ai_agent.db")
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (
+    ":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.endswith("://")
+)
+
+
+def _create_engine(read_only: bool = False):
+    pool_args = {}
+    if not IS_SQLITE_MEMORY:
+        pool_args = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    new_engine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL, echo=DATABASE_ECHO, future=True, **pool_args
+    )
+
+    if IS_SQLITE:
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets history reads run alongside writes
+            cursor = dbapi_connection.cursor()
+            # Only takes effect on a new file (before WAL and the first table);
+            # lets the history archiver shrink the file after deleting rows
+            if not read_only:
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+
+    return new_engine
+
+
+engine = _create_engine()
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Separate pool for history reads, so they never queue behind writers
+read_engine = engine if IS_SQLITE_MEMORY else _create_engine(read_only=True)
+ReadOnlySessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
 
 # Dependency to get async DB session
 async def get_db():
@@ -14,3 +72,19 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+# Dependency to get a read-only async DB session
+async def get_read_db():
+    async with ReadOnlySessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def dispose_engines():
+    """Close pooled connections on shutdown"""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -0,0 +1,281 @@
+import asyncio
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import delete, select, text
+
+from backend.src.db.database import IS_SQLITE
+from backend.src.models.models import ChatHistory as ChatHistoryModel
+from backend.src.utils.metrics import HISTORY_ARCHIVED_ROWS
+
+# Rows older than this many days are archived (unset: no in-process schedule)
+HISTORY_RETENTION_DAYS = os.getenv("HISTORY_RETENTION_DAYS")
+# Where the compressed archive is written, one subdirectory per day
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", "./history_archive")
+# How often the in-process schedule runs, and rows moved per transaction
+HISTORY_ARCHIVE_INTERVAL_SECONDS = float(
+    os.getenv("HISTORY_ARCHIVE_INTERVAL_SECONDS", "3600")
+)
+HISTORY_ARCHIVE_BATCH_SIZE = int(os.getenv("HISTORY_ARCHIVE_BATCH_SIZE", "2000"))
+
+PARTITION_PATTERN = re.compile(r"^day=(\d{4}-\d{2}-\d{2})$")
+
+
+def partition_dir(archive_dir: str, day: date) -> str:
+    return os.path.join(archive_dir, f"day={day.isoformat()}")
+
+
+def _to_record(row) -> Dict[str, Any]:
+    record = dict(row)
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+def write_part(archive_dir: str, day: date, records: List[Dict[str, Any]]) -> int:
+    """Write one day's rows as a new gzipped JSON-lines part file; returns its size.
+
+    Parts are never modified once written: the file is fsynced under a
+    temporary name and then renamed, so readers only ever see complete parts.
+    The name is the id range plus a hash of the rows, so re-archiving rows left
+    behind by a crash between the write and the delete replaces the part,
+    while new rows (SQLite reuses the ids of deleted rows) get a part of their
+    own.
+    """
+    directory = partition_dir(archive_dir, day)
+    os.makedirs(directory, exist_ok=True)
+    lines = [
+        json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records
+    ]
+    digest = hashlib.sha256(b"".join(lines)).hexdigest()[:12]
+    name = f"part-{records[0]['id']:012d}-{records[-1]['id']:012d}-{digest}.jsonl.gz"
+    path = os.path.join(directory, name)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.writelines(lines)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return os.path.getsize(path)
+
+
+def archive_days(archive_dir: str) -> List[date]:
+    """Days that have an archive partition, oldest first"""
+    if not os.path.isdir(archive_dir):
+        return []
+    days = []
+    for name in os.listdir(archive_dir):
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            days.append(date.fromisoformat(match.group(1)))
+    return sorted(days)
+
+
+def read_archive(
+    archive_dir: str, since: Optional[date] = None, until: Optional[date] = None
+) -> Iterator[Dict[str, Any]]:
+    """Stream archived rows for the days in [since, until], oldest day first.
+
+    Files are decompressed line by line, so memory stays flat however large
+    the archive is. Rows archived twice (a crash between writing a part and
+    deleting its rows) are yielded once, rows that only share a reused id
+    are not.
+    """
+    for day in archive_days(archive_dir):
+        if (since and day < since) or (until and day > until):
+            continue
+        directory = partition_dir(archive_dir, day)
+        seen = set()
+        for name in sorted(os.listdir(directory)):
+            if not name.startswith("part-"):
+                continue
+            with gzip.open(os.path.join(directory, name), "rt") as f:
+                for line in f:
+                    record = json.loads(line)
+                    # A reused id comes with a later created_at
+                    key = (record["id"], record["created_at"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    yield record
+
+
+class HistoryArchiver:
+    """Moves chat history older than the retention period into the archive.
+
+    Each batch is read, written out as per-day part files, and only then
+    deleted from ``chat_histories``. Afterwards SQLite's free pages are
+    returned to the filesystem with ``PRAGMA incremental_vacuum``. A file lock
+    in the archive directory keeps workers from archiving at the same time.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        engine,
+        archive_dir: str = HISTORY_ARCHIVE_DIR,
+        retention_days: float = 30,
+        batch_size: int = HISTORY_ARCHIVE_BATCH_SIZE,
+        interval: float = HISTORY_ARCHIVE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.engine = engine
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.runs_skipped = 0
+        self.rows_archived = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def _try_lock(self) -> Optional[int]:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        fd = os.open(os.path.join(self.archive_dir, ".lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    async def _archive_batch(self, cutoff: datetime) -> Dict[str, int]:
+        table = ChatHistoryModel.__table__
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(table)
+                .where(table.c.created_at < cutoff)
+                .order_by(table.c.created_at, table.c.id)
+                .limit(self.batch_size)
+            )
+            rows = result.mappings().all()
+        if not rows:
+            return {"rows": 0, "files": 0, "bytes": 0}
+
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_day.setdefault(row["created_at"].date(), []).append(_to_record(row))
+        written = 0
+        for day, records in by_day.items():
+            records.sort(key=lambda record: record["id"])
+            written += await asyncio.to_thread(
+                write_part, self.archive_dir, day, records
+            )
+
+        # A fresh transaction: under WAL, upgrading the read above to a write
+        # fails if the history writer committed in the meantime
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(ChatHistoryModel).where(
+                    ChatHistoryModel.id.in_([row["id"] for row in rows])
+                )
+            )
+            await session.commit()
+        HISTORY_ARCHIVED_ROWS.inc(len(rows))
+        return {"rows": len(rows), "files": len(by_day), "bytes": written}
+
+    async def vacuum(self) -> Optional[Dict[str, int]]:
+        """Give free pages back to the filesystem; None when not possible"""
+        if not IS_SQLITE:
+            return None
+        async with self.engine.connect() as conn:
+            mode = await conn.scalar(text("PRAGMA auto_vacuum"))
+            if mode != 2:
+                logger.warning(
+                    "SQLite auto_vacuum is not INCREMENTAL, so archived rows don't "
+                    "shrink the file; run `python -m backend.scripts.archive_history "
+                    "--action enable-incremental-vacuum` once"
+                )
+                return None
+            free_before = await conn.scalar(text("PRAGMA freelist_count"))
+            # Each step frees one page, but sqlite3 steps a statement without
+            # result columns only once; executescript runs it to completion
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.executescript("PRAGMA incremental_vacuum;")
+            free_after = await conn.scalar(text("PRAGMA freelist_count"))
+        return {"pages_freed": free_before - free_after}
+
+    async def enable_incremental_vacuum(self):
+        """Switch an existing SQLite file to incremental auto-vacuum (rewrites the file)"""
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            await conn.execute(text("VACUUM"))
+            mode = await conn.scalar(text("PRAGMA auto_vacuum"))
+        logger.info(f"SQLite auto_vacuum is now {mode} (2 = incremental)")
+
+    async def archive_once(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Archive and delete every row past the retention period, then vacuum"""
+        lock_fd = self._try_lock()
+        if lock_fd is None:
+            self.runs_skipped += 1
+            return {"skipped": "another process is archiving"}
+        try:
+            start = time.perf_counter()
+            cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+            report = {"cutoff": cutoff.isoformat(), "rows": 0, "files": 0, "bytes": 0}
+            while True:
+                batch = await self._archive_batch(cutoff)
+                for key in ("rows", "files", "bytes"):
+                    report[key] += batch[key]
+                if batch["rows"] < self.batch_size:
+                    break
+            if report["rows"]:
+                report["vacuum"] = await self.vacuum()
+            report["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+        self.runs += 1
+        self.rows_archived += report["rows"]
+        self.last_run = report
+        logger.info(f"Chat history archive run: {report}")
+        return report
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.archive_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Chat history archive run failed")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "runs": self.runs,
+            "runs_skipped": self.runs_skipped,
+            "rows_archived": self.rows_archived,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
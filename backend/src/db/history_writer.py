@@ -0,0 +1,174 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import insert
+
+from backend.src.models.models import ChatHistory as ChatHistoryModel
+from backend.src.utils.metrics import stage
+from backend.src.utils.resilience import backoff_delay
+
+
+class HistoryWriter:
+    """Write-behind persistence for chat history rows.
+
+    Rows are put on a bounded queue and a background task inserts them in
+    multi-row batches once ``batch_size`` rows are waiting or ``flush_interval``
+    seconds have passed. ``enqueue`` waits while the queue is full, which
+    pushes back on request handlers instead of growing memory without bound.
+
+    A failed batch is retried ``max_retries`` times with backoff (e.g. while
+    the database is locked), then written row by row, so only rows that
+    can't be written at all are dropped.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.1,
+        retry_backoff_max: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        # conversation_id -> rows queued but not yet written
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_failed = 0
+        self.retries = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, row: Dict[str, Any]):
+        """Queue one chat history row (column name -> value)"""
+        row.setdefault("created_at", datetime.utcnow())
+        if row.get("conversation_id"):
+            self._pending.setdefault(row["conversation_id"], []).append(row)
+        await self.queue.put(row)
+
+    def pending_rows(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Rows of a conversation that are queued but not yet in the database"""
+        return list(self._pending.get(conversation_id, []))
+
+    def _forget(self, batch: List[Dict[str, Any]]):
+        for row in batch:
+            rows = self._pending.get(row.get("conversation_id"))
+            if rows is None:
+                continue
+            rows[:] = [pending for pending in rows if pending is not row]
+            if not rows:
+                del self._pending[row["conversation_id"]]
+
+    async def _next_batch(self):
+        """Collect up to batch_size rows; also report whether stop was requested"""
+        row = await self.queue.get()
+        if row is None:
+            return [], True
+        batch = [row]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is None:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        with stage("db_write"):
+            async with self.session_factory() as session:
+                await session.execute(insert(ChatHistoryModel), rows)
+                await session.commit()
+                # Readers see the rows from here on; forget them before the
+                # session close yields, or they'd be read twice meanwhile
+                self._forget(rows)
+
+    async def _insert_with_retries(self, rows: List[Dict[str, Any]]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._insert(rows)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.warning(
+                        f"Failed to write {len(rows)} chat history rows: {e}"
+                    )
+                    return False
+                self.retries += 1
+                logger.warning(f"Chat history write failed, retrying: {e}")
+                await asyncio.sleep(
+                    backoff_delay(attempt, self.retry_backoff, self.retry_backoff_max)
+                )
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        if await self._insert_with_retries(batch):
+            self.rows_written += len(batch)
+            self.batches_written += 1
+            return
+
+        failed = batch
+        if len(batch) > 1:
+            # One bad row mustn't take the rest of the batch down with it
+            failed = []
+            for row in batch:
+                try:
+                    await self._insert([row])
+                    self.rows_written += 1
+                except Exception:
+                    failed.append(row)
+        if failed:
+            self._forget(failed)
+            self.rows_failed += len(failed)
+            logger.error(f"Dropped {len(failed)} chat history rows after retries")
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+        # Anything queued behind the stop marker is flushed as well
+        pending = []
+        while not self.queue.empty():
+            row = self.queue.get_nowait()
+            if row is not None:
+                pending.append(row)
+        for start in range(0, len(pending), self.batch_size):
+            await self._write(pending[start : start + self.batch_size])
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+        logger.info(f"Chat history writer stopped after {self.rows_written} rows")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rows_failed": self.rows_failed,
+            "retries": self.retries,
+        }
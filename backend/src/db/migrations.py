@@ -0,0 +1,75 @@
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, inspect, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from backend.src.models.models import ChatHistory as ChatHistoryModel
+
+# Columns added to chat_histories after the table was first released, in
+# order: (column, DDL type and default, backfill for rows that predate it)
+CHAT_HISTORY_COLUMNS: List[Tuple[str, str, Optional[Callable]]] = [
+    # Older rows belong to no conversation, so they never show up as memory
+    ("conversation_id", "VARCHAR", None),
+    (
+        "requires_human",
+        "BOOLEAN DEFAULT 0",
+        lambda: update(ChatHistoryModel).values(
+            requires_human=func.coalesce(
+                ChatHistoryModel.metadata_info["requires_human"].as_boolean(), False
+            )
+        ),
+    ),
+]
+
+
+def upgrade_schema(connection) -> List[str]:
+    """Bring an existing chat_histories table up to the current model.
+
+    ``create_all`` creates missing tables but never alters existing ones, so
+    columns added since are added here (and backfilled), then any missing
+    index is created. Safe to run on every start: each step is skipped once
+    applied. Returns the steps that were applied. Takes a sync connection, for
+    ``AsyncConnection.run_sync``.
+    """
+    table = ChatHistoryModel.__table__
+    if not inspect(connection).has_table(table.name):
+        return []
+
+    applied = []
+    columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for name, ddl, backfill in CHAT_HISTORY_COLUMNS:
+        if name in columns:
+            continue
+        try:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table.name} ADD COLUMN {name} {ddl}"
+            )
+        except (OperationalError, ProgrammingError):
+            # Another worker added it first
+            if name not in {
+                column["name"] for column in inspect(connection).get_columns(table.name)
+            }:
+                raise
+            continue
+        if backfill is not None:
+            connection.execute(backfill())
+        columns.add(name)
+        applied.append(f"add column {table.name}.{name}")
+
+    existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing or not {c.name for c in index.columns} <= columns:
+            continue
+        index.create(connection, checkfirst=True)
+        applied.append(f"create index {index.name}")
+
+    if applied:
+        logger.info(f"Upgraded database schema: {', '.join(applied)}")
+    return applied
+
+
+async def upgrade_database(engine) -> List[str]:
+    """Run ``upgrade_schema`` in its own transaction"""
+    async with engine.begin() as conn:
+        return await conn.run_sync(upgrade_schema)
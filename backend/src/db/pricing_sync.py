@@ -0,0 +1,149 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+from loguru import logger
+from sqlalchemy import func, select
+
+from backend.src.models.models import PricingVersion
+from backend.src.utils.pricing import (
+    InvalidPricingData,
+    pricing_version,
+    validate_pricing_data,
+)
+
+if TYPE_CHECKING:
+    from backend.src.utils.ai_agent import AIAgent
+
+
+class PricingSync:
+    """Keeps this worker's pricing context on the newest version in the database.
+
+    ``publish`` stores a pricing payload as a new version and applies it
+    locally. Every other worker polls every ``poll_interval`` seconds; a poll
+    reads only the newest id off the primary key, and the payload is loaded
+    and applied only when that id has moved past the one already applied.
+    """
+
+    def __init__(self, session_factory, poll_interval: float = 2.0):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.ai_agent: Optional["AIAgent"] = None
+        # None until a stored version is applied (the built-in defaults are in use)
+        self.applied_id: Optional[int] = None
+        # Stored versions whose payload can't be applied
+        self.rejected_ids: Set[int] = set()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.poll_errors = 0
+        self.versions_applied = 0
+
+    async def start(self, ai_agent: "AIAgent"):
+        """Catch up with the stored pricing, then keep polling in the background"""
+        self.ai_agent = ai_agent
+        try:
+            await self.sync()
+        except Exception:
+            logger.exception("Failed to load stored pricing; serving defaults")
+        self._task = asyncio.create_task(self._run())
+
+    async def publish(self, pricing_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the index for a pricing payload, store it as a new version and
+        apply it to this worker; returns the index build report.
+
+        Raises InvalidPricingData for a malformed payload. The version is only
+        stored once its index has built, so other workers never poll a payload
+        that can't be applied.
+        """
+        validate_pricing_data(pricing_data)
+        version = pricing_version(pricing_data)
+        record = PricingVersion(version=version, pricing_data=pricing_data)
+
+        async def store():
+            async with self.session_factory() as session:
+                session.add(record)
+                await session.commit()
+
+        async with self._lock:
+            ingestion = await self.ai_agent.aset_pricing_context(
+                pricing_data, version, before_swap=store
+            )
+            self.applied_id = record.id
+            self.versions_applied += 1
+        logger.info(f"Published pricing version {record.id} ({version})")
+        return {
+            "version_id": record.id,
+            "pricing_version": version,
+            "ingestion": ingestion,
+        }
+
+    async def sync(self) -> bool:
+        """Apply the newest valid stored version if this worker is behind it"""
+        async with self.session_factory() as session:
+            latest_id = await session.scalar(
+                select(func.max(PricingVersion.id)).where(
+                    PricingVersion.id.notin_(self.rejected_ids)
+                )
+            )
+            if latest_id is None or self._is_applied(latest_id):
+                return False
+            record = await session.get(PricingVersion, latest_id)
+        try:
+            validate_pricing_data(record.pricing_data)
+        except InvalidPricingData as e:
+            # Stored before publish validated payloads; skipped from now on
+            self.rejected_ids.add(record.id)
+            logger.error(f"Skipping invalid pricing version {record.id}: {e}")
+            return False
+        return (
+            await self._apply(record.id, record.version, record.pricing_data)
+            is not None
+        )
+
+    def _is_applied(self, version_id: int) -> bool:
+        return self.applied_id is not None and version_id <= self.applied_id
+
+    async def _apply(
+        self, version_id: int, version: str, pricing_data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a version unless a newer one already is; returns the build report"""
+        # Serialized, so a slow older version can't land after a newer one
+        async with self._lock:
+            if self._is_applied(version_id):
+                return None
+            report = await self.ai_agent.aset_pricing_context(pricing_data, version)
+            self.applied_id = version_id
+            self.versions_applied += 1
+        logger.info(f"Applied pricing version {version_id} ({version})")
+        return report
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.polls += 1
+            try:
+                await self.sync()
+            except Exception as e:
+                self.poll_errors += 1
+                logger.warning(f"Pricing version poll failed: {e}")
+
+    async def stop(self):
+        """Stop polling"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "applied_version_id": self.applied_id,
+            "poll_interval_seconds": self.poll_interval,
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "versions_applied": self.versions_applied,
+            "versions_rejected": sorted(self.rejected_ids),
+        }
@@ -1,6 +1,16 @@
 from datetime import datetime
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -41,10 +51,46 @@ class ChatHistory(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     agent_id = Column(Integer, ForeignKey("agents.id"))
+    conversation_id = Column(String)
     message = Column(Text)
     response = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     metadata_info = Column(JSON)  # For storing additional context like pricing data
+    # Copied out of metadata_info so history can be filtered on an index
+    requires_human = Column(Boolean, default=False)
 
     # Relationships
     agent = relationship("Agent", back_populates="chat_histories")
+
+    # Keyset pagination on (created_at, id), optionally within a filter
+    __table_args__ = (
+        Index("ix_chat_histories_created_at_id", "created_at", "id"),
+        Index(
+            "ix_chat_histories_agent_id_created_at_id", "agent_id", "created_at", "id"
+        ),
+        Index(
+            "ix_chat_histories_requires_human_created_at_id",
+            "requires_human",
+            "created_at",
+            "id",
+        ),
+        # Loading the most recent turns of one conversation
+        Index(
+            "ix_chat_histories_conversation_id_created_at_id",
+            "conversation_id",
+            "created_at",
+            "id",
+        ),
+    )
+
+
+class PricingVersion(Base):
+    """Every pricing update, newest last; workers poll for the latest id"""
+
+    __tablename__ = "pricing_versions"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    # Content hash of pricing_data, also used to key the response cache
+    version = Column(String, nullable=False)
+    pricing_data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
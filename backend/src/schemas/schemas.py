@@ -46,20 +46,46 @@ class Agent(AgentBase):
 class ChatMessage(BaseModel):
     message: str
     agent_id: int = 1  # Default to agent ID 1 for demo
+    conversation_id: Optional[str] = None  # Omit to start a new conversation
 
 
 class ChatResponse(BaseModel):
     response: str
     metadata_info: Optional[Dict[str, Any]] = None
+    conversation_id: Optional[str] = None
+
+
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatMessage]
+
+
+class ChatBatchItem(BaseModel):
+    index: int
+    status: str  # ok, rejected (shed under overload), error
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class ChatBatchResponse(BaseModel):
+    items: List[ChatBatchItem]
+    succeeded: int
+    failed: int
 
 
 class ChatHistory(BaseModel):
     id: int
     agent_id: int
+    conversation_id: Optional[str] = None
     message: str
     response: str
     created_at: datetime
     metadata_info: Optional[Dict[str, Any]] = None
+    requires_human: Optional[bool] = None
 
     class Config:
         from_attributes = True
+
+
+class ChatHistoryPage(BaseModel):
+    items: List[ChatHistory]
+    next_cursor: Optional[str] = None
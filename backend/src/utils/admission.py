@@ -0,0 +1,182 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from backend.src.utils.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    record_admission,
+    stage,
+)
+
+# Concurrent LLM generations per process, and how many may wait for one
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "64"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "2"))
+# Per-client chat requests per minute; unset disables rate limiting
+CLIENT_RATE_LIMIT_PER_MINUTE = os.getenv("CLIENT_RATE_LIMIT_PER_MINUTE")
+CLIENT_RATE_LIMIT_BURST = int(os.getenv("CLIENT_RATE_LIMIT_BURST", "10"))
+# Peer addresses (e.g. a gateway) whose X-Client-ID header is trusted for rate limiting
+RATE_LIMIT_TRUSTED_PROXIES = {
+    address.strip()
+    for address in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+    if address.strip()
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of waiting for capacity"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Bounded concurrency with a short FIFO wait queue.
+
+    Up to ``max_in_flight`` holders run at once. Further requests wait in a
+    queue of at most ``max_queue`` for up to ``queue_timeout`` seconds; a full
+    queue or an expired wait raises ``AdmissionRejected`` at once, so admitted
+    requests keep a predictable latency while the excess is shed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        max_queue: int = LLM_QUEUE_SIZE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self.counts: Dict[str, int] = {}
+
+    def _count(self, outcome: str):
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        record_admission(outcome)
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+
+    async def _acquire(self):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._count("admitted")
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._count("rejected_queue_full")
+            raise AdmissionRejected("queue_full", self.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            with stage("admission_wait"):
+                await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # A slot handed over in the same tick as the timeout is taken,
+            # rather than leaked by rejecting with it
+            if not waiter.done() or waiter.cancelled():
+                self._count("rejected_queue_timeout")
+                raise AdmissionRejected("queue_timeout", self.queue_timeout) from None
+        except BaseException:
+            # Cancelled after a slot was already handed over: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+        self._count("admitted_after_wait")
+
+    def _release(self):
+        # A freed slot goes straight to the oldest live waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot for the duration of the block"""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "outcomes": dict(self.counts),
+        }
+
+
+class ClientRateLimiter:
+    """Per-client token buckets: ``rate_per_minute`` sustained, up to ``burst`` at once.
+
+    Only the ``max_clients`` most recently seen clients are tracked; a client
+    evicted from the table starts again with a full bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> (tokens, last refill time), most recently seen last
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self.limited = 0
+
+    def check(self, client: str, now: Optional[float] = None):
+        """Take one token for the client, or raise ``AdmissionRejected``"""
+        now = time.monotonic() if now is None else now
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            record_admission("rate_limited")
+            raise AdmissionRejected("rate_limited", (1 - tokens) / self.rate)
+        self._buckets[client] = (tokens - 1, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "limited": self.limited,
+        }
+
+
+def create_rate_limiter() -> Optional[ClientRateLimiter]:
+    """The configured per-client limiter, or None when rate limiting is off"""
+    if not CLIENT_RATE_LIMIT_PER_MINUTE:
+        return None
+    return ClientRateLimiter(
+        float(CLIENT_RATE_LIMIT_PER_MINUTE), CLIENT_RATE_LIMIT_BURST
+    )
@@ -1,18 +1,55 @@
+import asyncio
+import copy
 import os
-from typing import Any, Dict, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from loguru import logger
-from openai import OpenAI
 
+from backend.src.utils.admission import AdmissionController, AdmissionRejected
+from backend.src.utils.llm import (
+    CHAT_MODEL_NAME,
+    CHAT_MODEL_TEMPERATURE,
+    FAST_CHAT_MODEL_NAME,
+    FAST_CHAT_MODEL_TEMPERATURE,
+    create_chat_model,
+)
+from backend.src.utils.metrics import (
+    record_cache_event,
+    record_route,
+    record_usage,
+    stage,
+)
+from backend.src.utils.model_router import ModelRouter
+from backend.src.utils.price_index import PriceIndex
+from backend.src.utils.pricing import DEFAULT_PRICING_DATA, pricing_version
+from backend.src.utils.prompt_builder import PromptBuilder
+from backend.src.utils.resilience import CircuitOpenError, ResilientCall
+from backend.src.utils.response_cache import ResponseCache
+from backend.src.utils.single_flight import SingleFlight
 from backend.src.utils.vector_db import VectorDBManager
 
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Token budget for system prompt + retrieved context + chat history + question
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity for semantic cache hits; unset disables semantic lookup
+RESPONSE_CACHE_SEMANTIC_THRESHOLD = os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD")
+# Send simple and off-topic messages to the fast model or a template
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Latency percentile after which a second, hedged request is sent; unset disables
+LLM_HEDGE_PERCENTILE = os.getenv("LLM_HEDGE_PERCENTILE")
+
+# Retrievals shared across one batch: pricing version and query -> retrieval task
+shared_retrievals: ContextVar[Optional[Dict[str, asyncio.Future]]] = ContextVar(
+    "shared_retrievals", default=None
+)
 
 
 class ResponseTemplates:
@@ -69,6 +106,45 @@ Be polite and professional. Add line breaks for better readability.
             "metadata_info": {"requires_human": True, "error": error},
         }
 
+    def get_upstream_unavailable_response(self) -> Dict[str, Any]:
+        """Human-transfer response while the LLM circuit breaker is open"""
+        response = self.get_human_agent_transfer_response()
+        response["metadata_info"]["circuit_open"] = True
+        return response
+
+    def get_overloaded_response(self) -> Dict[str, Any]:
+        """Human-transfer response for a request shed under overload"""
+        response = self.get_human_agent_transfer_response()
+        response["metadata_info"]["overloaded"] = True
+        return response
+
+    def get_template_response(self, kind: str) -> Dict[str, Any]:
+        """Canned reply to a greeting or thanks, answered without the LLM"""
+        if kind == "greeting":
+            content = "Hi! I'm the BikeHero assistant. I can help with service packages, add-on repairs and pricing, or booking a visit. What can I help you with?"
+        else:
+            content = f"You're welcome! If there's anything else about your bike, just ask. You can also book directly at {self.booking_url}"
+        return {
+            "response": content,
+            "metadata_info": {
+                "requires_human": False,
+                "topic": "bikehero_services",
+                "answered_by": "template",
+                "model_tier": "template",
+            },
+        }
+
+    def get_price_lookup_response(self, content: str) -> Dict[str, Any]:
+        """Response for direct price lookups answered from the price index"""
+        return {
+            "response": f"{content}\n\nBook directly online at {self.booking_url}",
+            "metadata_info": {
+                "requires_human": False,
+                "topic": "bikehero_services",
+                "answered_by": "price_index",
+            },
+        }
+
     def get_success_response(self, content: str) -> Dict[str, Any]:
         """Response for successful AI-generated responses"""
         return {
@@ -82,75 +158,381 @@ Be polite and professional. Add line breaks for better readability.
 
 class AIAgent:
     def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.chat_model = ChatOpenAI(
-            model_name="gpt-4.1-mini",
-            temperature=0.7,
-            api_key=OPENAI_API_KEY,
-        )
+        # Per-tier chat models; ModelRouter decides which one a message needs
+        self.model_names = {"fast": FAST_CHAT_MODEL_NAME, "main": CHAT_MODEL_NAME}
+        self.chat_models = {
+            "fast": create_chat_model(
+                FAST_CHAT_MODEL_NAME, FAST_CHAT_MODEL_TEMPERATURE
+            ),
+            "main": create_chat_model(CHAT_MODEL_NAME, CHAT_MODEL_TEMPERATURE),
+        }
         self.vector_db = VectorDBManager()
         self.booking_url = "https://bikehero.sg/goifnmnf"
         self.response_templates = ResponseTemplates(self.booking_url)
+        self.response_cache = ResponseCache(
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+            semantic_threshold=(
+                float(RESPONSE_CACHE_SEMANTIC_THRESHOLD)
+                if RESPONSE_CACHE_SEMANTIC_THRESHOLD
+                else None
+            ),
+        )
+        self.pricing_version = "default"
+        self.response_cache.invalidate(self.pricing_version)
+        self.price_index = PriceIndex(DEFAULT_PRICING_DATA)
+        self.router = ModelRouter(self.price_index)
+        self.single_flight = SingleFlight()
+        self.prompt_builder = PromptBuilder(PROMPT_TOKEN_BUDGET)
+        # Caps concurrent generations; excess requests queue briefly, then are shed
+        self.admission = AdmissionController()
+        self.llm_guard = ResilientCall(
+            "llm",
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+            hedge_percentile=(
+                float(LLM_HEDGE_PERCENTILE) if LLM_HEDGE_PERCENTILE else None
+            ),
+        )
+
+    def warm_up(self):
+        """Load embeddings and build the vector store with default pricing data, once per process"""
+        self.vector_db.warm_up()
+
+    def close(self):
+        """Release resources held by the agent"""
+        self.vector_db.close()
+
+    def set_pricing_context(
+        self, pricing_data: Dict[str, Any], version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Set the pricing context for the RAG system; returns the index build report"""
+        version = version or pricing_version(pricing_data)
+        report = self.vector_db.update_pricing_data(pricing_data, version)
+        self._swap_pricing(pricing_data, version)
+        return report
+
+    async def aset_pricing_context(
+        self,
+        pricing_data: Dict[str, Any],
+        version: Optional[str] = None,
+        before_swap: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Set the pricing context, building the new search index off the event loop.
+
+        ``before_swap`` is awaited once the index is built; if it raises, the
+        current pricing stays in place.
+        """
+        version = version or pricing_version(pricing_data)
+        index, report = await asyncio.to_thread(
+            self.vector_db.build_index, pricing_data, version
+        )
+        if before_swap is not None:
+            await before_swap()
+        # No await between the two swaps, so requests on the event loop see
+        # either the old or the new pricing throughout
+        self.vector_db.activate(index)
+        self._swap_pricing(pricing_data, version)
+        await asyncio.to_thread(self.vector_db.prune)
+        return report
+
+    def _swap_pricing(self, pricing_data: Dict[str, Any], version: str):
+        price_index = PriceIndex(pricing_data)
+        router = ModelRouter(price_index)
+        self.price_index, self.router, self.pricing_version = (
+            price_index,
+            router,
+            version,
+        )
+        self.response_cache.invalidate(version)
+
+    def _route(self, message: str, chat_history: Optional[List[Dict[str, str]]]):
+        """(tier, reason) for a message; everything goes to the main model when routing is off"""
+        if not MODEL_ROUTING:
+            return "main", "routing_disabled"
+        return self.router.classify(message, has_history=bool(chat_history))
+
+    async def _check_cache(self, message: str, use_cache: bool, pricing_version: str):
+        """Return (cached response or None, query embedding computed for the lookup)"""
+        if not use_cache:
+            return None, None
+        cached = self.response_cache.get(message, pricing_version)
+        if cached or self.response_cache.semantic_threshold is None:
+            return cached, None
+        try:
+            query_embedding = await self.vector_db.aembed_query(message)
+        except Exception as e:
+            logger.warning(f"Skipping semantic cache lookup: {e}")
+            return None, None
+        return (
+            self.response_cache.get_similar(query_embedding, pricing_version),
+            query_embedding,
+        )
+
+    @contextmanager
+    def share_retrievals(self):
+        """Within this block, and tasks started in it, identical queries share one retrieval"""
+        token = shared_retrievals.set({})
+        try:
+            yield
+        finally:
+            shared_retrievals.reset(token)
+
+    async def _retrieve(self, message: str, query_embedding: List[float] = None):
+        memo = shared_retrievals.get()
+        if memo is None:
+            return await self.vector_db.asearch_relevant_context(
+                message, embedding=query_embedding
+            )
+        key = f"{self.pricing_version}:{ResponseCache.normalize(message)}"
+        task = memo.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self.vector_db.asearch_relevant_context(
+                    message, embedding=query_embedding
+                )
+            )
+            memo[key] = task
+        else:
+            record_cache_event("shared_retrieval")
+        return await asyncio.shield(task)
+
+    async def _build_messages(
+        self,
+        message: str,
+        chat_history: List[Dict[str, str]] = None,
+        query_embedding: List[float] = None,
+    ):
+        """Retrieve pricing context and build the token-budgeted prompt messages"""
+        relevant_context = await self._retrieve(message, query_embedding)
+
+        logger.info(f"RAG results: {len(relevant_context)} chunks")
+
+        # Fit system prompt, retrieved context and chat history into the budget
+        with stage("prompt_build"):
+            messages, prompt_tokens = self.prompt_builder.build(
+                self.response_templates.system_prompt,
+                relevant_context,
+                message,
+                chat_history,
+            )
+        logger.debug(f"Prompt tokens (estimated): {prompt_tokens}")
+        return messages
+
+    def _finalize_response(
+        self,
+        content: str,
+        message: str,
+        use_cache: bool,
+        pricing_version: str,
+        query_embedding: List[float] = None,
+        tier: str = "main",
+    ) -> Dict[str, Any]:
+        """Turn the model output into a response envelope and cache it"""
+        # Check if the response indicates need for human agent
+        if "transfer to human agent" in content.lower():
+            result = self.response_templates.get_human_agent_transfer_response()
+        else:
+            result = self.response_templates.get_success_response(content)
+        result["metadata_info"]["model_tier"] = tier
+        result["metadata_info"]["model"] = self.model_names[tier]
+
+        if use_cache:
+            result["metadata_info"]["cache_hit"] = False
+            self.response_cache.set(message, pricing_version, result, query_embedding)
+        return result
+
+    async def _generate(
+        self,
+        message: str,
+        chat_history: List[Dict[str, str]],
+        use_cache: bool,
+        pricing_version: str,
+        route=("main", "default"),
+    ) -> Dict[str, Any]:
+        """Cache lookup, retrieval and LLM call for one message"""
+        tier, reason = route
+        # Retrieve context and generate response
+        try:
+            cached, query_embedding = await self._check_cache(
+                message, use_cache, pricing_version
+            )
+            if cached:
+                record_cache_event(
+                    f"response_cache_{cached['metadata_info']['cache_hit']}"
+                )
+                return cached
+
+            # Fail fast while the LLM is known to be down
+            if self.llm_guard.breaker.is_open():
+                return self.response_templates.get_upstream_unavailable_response()
+
+            async with self.admission.slot():
+                messages = await self._build_messages(
+                    message, chat_history, query_embedding
+                )
 
-        # Initialize the vector store with default pricing data
-        self.vector_db.initialize_vectorstore()
+                # Generate response
+                record_route(tier, reason, self.model_names[tier])
+                with stage("llm"):
+                    response = await self.llm_guard.call(
+                        lambda: self.chat_models[tier].ainvoke(messages)
+                    )
+            record_usage(response.usage_metadata)
+
+            return self._finalize_response(
+                response.content,
+                message,
+                use_cache,
+                pricing_version,
+                query_embedding,
+                tier,
+            )
 
-    def set_pricing_context(self, pricing_data: Dict[str, Any]):
-        """Set the pricing context for the RAG system"""
-        self.vector_db.update_pricing_data(pricing_data)
+        except CircuitOpenError:
+            return self.response_templates.get_upstream_unavailable_response()
+        except AdmissionRejected:
+            # The route decides between a 429 and a human-transfer reply
+            raise
+        except Exception as e:
+            # If vector search fails, fall back to human agent
+            return self.response_templates.get_vector_search_error_response(str(e))
 
     async def process_message(
         self, message: str, chat_history: List[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """Process a user message and generate a response using RAG with chat history"""
         try:
-            # Prepare chat history for context
-            chat_context = ""
-            if chat_history:
-                chat_context = "\n\nChat History:\n"
-                for entry in chat_history[-5:]:  # Last 5 messages for context
-                    role = entry.get("role", "user")
-                    content = entry.get("content", "")
-                    chat_context += f"{role.title()}: {content}\n"
-
-            # Retrieve context and generate response
-            try:
-                relevant_context = self.vector_db.search_relevant_context(message)
-                context_text = "\n\n".join(relevant_context)
-
-                logger.info(f"RAG results: {context_text}")
-
-                # Create the chat prompt with retrieved context and chat history
-                prompt = ChatPromptTemplate.from_messages(
-                    [
-                        SystemMessage(content=self.response_templates.system_prompt),
-                        HumanMessage(
-                            content=f"Pricing Information:\n{context_text}\n\n{chat_context}\n\nChat History:\n{chat_history}\n\nUser Question: {message}"
-                        ),
-                    ]
+            # Direct price lookups are answered without retrieval or the LLM
+            price_answer = self.price_index.match(message)
+            if price_answer:
+                record_cache_event("price_index")
+                return self.response_templates.get_price_lookup_response(price_answer)
+
+            # Greetings and thanks get a template; the rest picks a model tier
+            route = self._route(message, chat_history)
+            if route[0] == "template":
+                record_route(*route, "template")
+                return self.response_templates.get_template_response(route[1])
+
+            # Repeated questions are answered from the response cache; replies
+            # that depend on chat history are not cached
+            pricing_version = self.pricing_version
+            use_cache = not chat_history
+            if not use_cache:
+                return await self._generate(
+                    message, chat_history, use_cache, pricing_version, route
                 )
 
-                # Generate response
-                response = await self.chat_model.ainvoke(prompt.format_messages())
-
-                # Check if the response indicates need for human agent
-                if "transfer to human agent" in response.content.lower():
-                    return self.response_templates.get_human_agent_transfer_response()
+            # Identical questions already in flight share one generation
+            key = f"{pricing_version}:{ResponseCache.normalize(message)}"
+            result, leader = await self.single_flight.do(
+                key,
+                lambda: self._generate(
+                    message, None, use_cache, pricing_version, route
+                ),
+            )
+            if leader:
+                return result
+            record_cache_event("coalesced")
+            result = copy.deepcopy(result)
+            result["metadata_info"]["coalesced"] = True
+            return result
+
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            return self.response_templates.get_general_error_response(str(e))
 
-                return self.response_templates.get_success_response(response.content)
+    async def stream_message(
+        self, message: str, chat_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as ``token`` events followed by one ``done`` event.
 
-            except Exception as e:
-                # If vector search fails, fall back to human agent
-                return self.response_templates.get_vector_search_error_response(str(e))
+        The ``done`` event carries the same envelope ``process_message`` returns,
+        so human-transfer detection and ``metadata_info`` still apply.
+        """
+        try:
+            price_answer = self.price_index.match(message)
+            route = None if price_answer else self._route(message, chat_history)
+        except Exception as e:
+            # Still a done event, so the caller records the turn
+            result = self.response_templates.get_general_error_response(str(e))
+            yield {"event": "done", "data": result}
+            return
+
+        if price_answer:
+            record_cache_event("price_index")
+            result = self.response_templates.get_price_lookup_response(price_answer)
+            yield {"event": "token", "data": result["response"]}
+            yield {"event": "done", "data": result}
+            return
+
+        tier, reason = route
+        if tier == "template":
+            record_route(tier, reason, "template")
+            result = self.response_templates.get_template_response(reason)
+            yield {"event": "token", "data": result["response"]}
+            yield {"event": "done", "data": result}
+            return
+
+        pricing_version = self.pricing_version
+        use_cache = not chat_history
+        try:
+            cached, query_embedding = await self._check_cache(
+                message, use_cache, pricing_version
+            )
+            if cached:
+                record_cache_event(
+                    f"response_cache_{cached['metadata_info']['cache_hit']}"
+                )
+                yield {"event": "token", "data": cached["response"]}
+                yield {"event": "done", "data": cached}
+                return
+
+            if self.llm_guard.breaker.is_open():
+                raise CircuitOpenError("llm circuit is open")
+
+            chunks = []
+            usage = None
+            async with self.admission.slot():
+                messages = await self._build_messages(
+                    message, chat_history, query_embedding
+                )
 
+                record_route(tier, reason, self.model_names[tier])
+                with stage("llm"):
+                    async for chunk in self.llm_guard.stream(
+                        lambda: self.chat_models[tier].astream(messages)
+                    ):
+                        usage = chunk.usage_metadata or usage
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            yield {"event": "token", "data": chunk.content}
+            record_usage(usage)
+
+            result = self._finalize_response(
+                "".join(chunks),
+                message,
+                use_cache,
+                pricing_version,
+                query_embedding,
+                tier,
+            )
+        except CircuitOpenError:
+            result = self.response_templates.get_upstream_unavailable_response()
+        except AdmissionRejected:
+            # Headers are already sent, so a stream can't turn into a 429
+            result = self.response_templates.get_overloaded_response()
         except Exception as e:
-            return self.response_templates.get_general_error_response(str(e))
+            result = self.response_templates.get_vector_search_error_response(str(e))
 
+        yield {"event": "done", "data": result}
 
-if __name__ == "__main__":
-    import asyncio
 
+if __name__ == "__main__":
     agent = AIAgent()
+    agent.warm_up()
 
     # Example with chat history
     chat_history = [
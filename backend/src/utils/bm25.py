@@ -0,0 +1,106 @@
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from backend.src.utils.text import tokenize
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "get", "have", "how", "i", "if", "in", "is", "it", "me", "my", "of",
+    "on", "or", "so", "that", "the", "there", "this", "to", "up", "us", "was",
+    "we", "what", "when", "where", "which", "will", "with", "would", "you",
+    "your",
+}  # fmt: skip
+
+
+def index_terms(text: str) -> List[str]:
+    """Unigrams (hyphenated terms also split into parts) plus adjacent bigrams"""
+    words = [word for word in tokenize(text) if word not in STOPWORDS]
+    terms = []
+    for word in words:
+        terms.append(word)
+        if "-" in word:
+            terms += [part for part in word.split("-") if part not in STOPWORDS]
+    terms += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 over document chunks, backed by an inverted index.
+
+    Instances are immutable, so a rebuilt index can be swapped in with one
+    assignment. ``search`` also reports whether the keyword match is decisive:
+    the top chunk contains at least ``min_coverage`` of the query's words and
+    scores ``min_margin`` times the runner-up.
+    """
+
+    def __init__(
+        self,
+        documents: List[Document],
+        k1: float = 1.5,
+        b: float = 0.75,
+        min_coverage: float = 0.5,
+        min_margin: float = 1.5,
+    ):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.min_coverage = min_coverage
+        self.min_margin = min_margin
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        self.doc_terms: List[set] = []
+        for position, doc in enumerate(self.documents):
+            counts = Counter(index_terms(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            self.doc_terms.append(set(counts))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((position, tf))
+
+        total = len(self.documents)
+        self.avg_length = sum(self.doc_lengths) / total if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(
+        self, query: str, k: int = 3, section: Optional[str] = None
+    ) -> Tuple[List[Tuple[Document, float]], bool]:
+        """Return up to k (chunk, score) pairs, best first, and whether the top hit is decisive"""
+        query_terms = index_terms(query)
+        scores: Dict[int, float] = {}
+        for term in set(query_terms):
+            for position, tf in self.postings.get(term, ()):
+                length_norm = (
+                    1
+                    - self.b
+                    + self.b * self.doc_lengths[position] / (self.avg_length or 1)
+                )
+                scores[position] = scores.get(position, 0.0) + self.idf[term] * (
+                    tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                )
+
+        if section:
+            scores = {
+                position: score
+                for position, score in scores.items()
+                if self.documents[position].metadata.get("section") == section
+            }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return [], False
+
+        words = {term for term in query_terms if " " not in term}
+        top_position, top_score = ranked[0]
+        coverage = len(words & self.doc_terms[top_position]) / len(words)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        decisive = coverage >= self.min_coverage and (
+            runner_up == 0 or top_score / runner_up >= self.min_margin
+        )
+        return [
+            (self.documents[position], score) for position, score in ranked[:k]
+        ], decisive
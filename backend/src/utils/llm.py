@@ -0,0 +1,77 @@
+import os
+from typing import TYPE_CHECKING
+
+from dotenv import load_dotenv
+
+from backend.src.utils.local_embeddings import HashingEmbeddings
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# "openai" (default) or "fake" for in-process stand-ins that never hit the network
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+# Point the OpenAI clients at a compatible server, e.g. the benchmark fake
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+CHAT_MODEL_NAME = os.getenv("CHAT_MODEL_NAME", "gpt-4.1-mini")
+CHAT_MODEL_TEMPERATURE = float(os.getenv("CHAT_MODEL_TEMPERATURE", "0.7"))
+# Cheaper model for simple and off-topic messages (see ModelRouter)
+FAST_CHAT_MODEL_NAME = os.getenv("FAST_CHAT_MODEL_NAME", "gpt-4.1-nano")
+FAST_CHAT_MODEL_TEMPERATURE = float(os.getenv("FAST_CHAT_MODEL_TEMPERATURE", "0.3"))
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "text-embedding-ada-002")
+# "openai" (remote) or "local" (hashed n-grams computed in-process)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "2048"))
+FAKE_EMBEDDING_SIZE = int(os.getenv("FAKE_EMBEDDING_SIZE", "1536"))
+
+FAKE_CHAT_REPLY = (
+    "A standard tune-up starts from $59 and covers brake and gear adjustment, "
+    "a drivetrain clean and a safety check. Book here: https://bikehero.sg/goifnmnf"
+)
+
+
+def create_chat_model(
+    model_name: str = CHAT_MODEL_NAME, temperature: float = CHAT_MODEL_TEMPERATURE
+) -> "BaseChatModel":
+    """Chat model for the configured provider"""
+    # Provider SDKs are imported on first use; they dominate import time
+    if LLM_PROVIDER == "fake":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        return FakeListChatModel(responses=[FAKE_CHAT_REPLY])
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model_name=model_name,
+        temperature=temperature,
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        stream_usage=True,
+        # Deadlines and retries are applied by ResilientCall
+        max_retries=0,
+    )
+
+
+def create_embeddings() -> "Embeddings":
+    """Embedding model for the configured provider"""
+    if EMBEDDING_BACKEND == "local":
+        return HashingEmbeddings(dimensions=LOCAL_EMBEDDING_DIMENSIONS)
+    if LLM_PROVIDER == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        return DeterministicFakeEmbedding(size=FAKE_EMBEDDING_SIZE)
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL_NAME,
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        # Retried by ResilientCall (queries) and retry_sync (ingestion batches)
+        max_retries=0,
+        # Token-aware chunking needs tiktoken's encodings; compatible servers
+        # take raw strings, so skip it there and stay fully offline
+        check_embedding_ctx_length=OPENAI_BASE_URL is None,
+    )
@@ -0,0 +1,85 @@
+import zlib
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.src.utils.text import tokenize
+
+# Character n-grams catch spelling variants ("tyre"/"tire") but are far more
+# numerous than words, so each counts for less
+CHAR_NGRAM_WEIGHT = 0.3
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dimensions: int):
+    """Stable (index, sign) for a feature; crc32 so vectors match across processes"""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dimensions, 1.0 if (h >> 31) & 1 else -1.0
+
+
+class HashingEmbeddings(Embeddings):
+    """In-process embeddings from hashed word and character n-grams.
+
+    Needs no fitting and no network: words, word bigrams and character
+    n-grams are hashed into a fixed number of signed buckets, counts are
+    log-scaled and rows L2-normalized. Encoding a query takes tens of
+    microseconds, so retrieval never leaves the process.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 2048,
+        char_ngram_range=(3, 5),
+    ):
+        self.dimensions = dimensions
+        self.char_ngram_range = char_ngram_range
+        self.model = f"hashing-{dimensions}"
+
+    def _features(self, text: str):
+        words = tokenize(text)
+        features = [(word, 1.0) for word in words]
+        features += [(f"{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+        low, high = self.char_ngram_range
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                features += [
+                    (f"#{padded[i : i + n]}", CHAR_NGRAM_WEIGHT)
+                    for i in range(len(padded) - n + 1)
+                ]
+        return features
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into one (len(texts), dimensions) float32 matrix"""
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                index, sign = _bucket(feature, self.dimensions)
+                rows.append(row)
+                cols.append(index)
+                values.append(sign * weight)
+        if rows:
+            np.add.at(matrix, (rows, cols), values)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def warm_up(self):
+        """Populate the feature hash cache before the first request"""
+        self.encode(["bike tune-up brake pads gear cables premium package"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    # CPU-bound and fast enough that a thread hop would cost more than it saves
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
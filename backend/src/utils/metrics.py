@@ -0,0 +1,182 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Attach the per-request stage breakdown to metadata_info when enabled
+METRICS_IN_RESPONSE = os.getenv("METRICS_IN_RESPONSE", "false").lower() == "true"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)  # fmt: skip
+
+REQUEST_LATENCY = Histogram(
+    "chat_request_seconds",
+    "End-to-end chat request latency",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "chat_stage_seconds",
+    "Latency of each stage of a chat request",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ["kind"])
+CACHE_EVENTS = Counter(
+    "chat_cache_events_total",
+    "Chat requests answered without a fresh LLM call, by source",
+    ["source"],
+)
+RESPONSES = Counter(
+    "chat_responses_total",
+    "Chat responses by human-transfer outcome",
+    ["requires_human"],
+)
+RETRIEVALS = Counter(
+    "retrievals_total",
+    "Context retrievals by path (keyword skips the embedding call)",
+    ["path"],
+)
+RETRIEVED_CHUNKS = Histogram(
+    "retrieval_chunks",
+    "Context chunks returned per retrieval",
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20),
+)
+CHAT_ROUTES = Counter(
+    "chat_model_routes_total",
+    "Messages by model tier, routing reason and model",
+    ["tier", "reason", "model"],
+)
+UPSTREAM_CALLS = Counter(
+    "upstream_calls_total",
+    "LLM and embedding call outcomes (success, error, timeout, retried, hedged, hedge_won, rejected)",
+    ["upstream", "outcome"],
+)
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+    ["upstream"],
+)
+ADMISSIONS = Counter(
+    "chat_admissions_total",
+    "Chat admission outcomes (admitted, admitted_after_wait, rejected_queue_full, rejected_queue_timeout, rate_limited)",
+    ["outcome"],
+)
+ADMISSION_IN_FLIGHT = Gauge("chat_admission_in_flight", "LLM slots in use")
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "chat_admission_queue_depth", "Requests waiting for an LLM slot"
+)
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "response_cache_entries", "Entries in the response cache"
+)
+HISTORY_QUEUE_DEPTH = Gauge(
+    "history_writer_queue_depth", "Chat history rows waiting to be written"
+)
+HISTORY_ARCHIVED_ROWS = Counter(
+    "history_archived_rows_total", "Chat history rows moved to the archive"
+)
+
+
+class RequestTimer:
+    """Per-request stage timings and token counts"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[str, int] = {}
+
+    def breakdown(self) -> Dict[str, Any]:
+        return {
+            "timings_ms": {
+                stage: round(seconds * 1000, 3)
+                for stage, seconds in self.stages.items()
+            },
+            "tokens": dict(self.tokens),
+        }
+
+
+current_timer: ContextVar[Optional[RequestTimer]] = ContextVar(
+    "current_timer", default=None
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage into the histogram and the current request's breakdown"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(name).observe(elapsed)
+        timer = current_timer.get()
+        if timer is not None:
+            timer.stages[name] = timer.stages.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def track_request(
+    endpoint: str, timer: Optional[RequestTimer] = None, finish: bool = True
+):
+    """Collect stage timings for the request running in this context.
+
+    A request handled in two parts (a streaming response body runs after the
+    handler returns) passes ``finish=False`` to the first block and its timer
+    to the second; latency is observed once, from when the timer was created.
+    """
+    timer = timer or RequestTimer()
+    token = current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        if finish:
+            REQUEST_LATENCY.labels(endpoint).observe(
+                time.perf_counter() - timer.started
+            )
+        current_timer.reset(token)
+
+
+def record_usage(usage: Optional[Dict[str, Any]]):
+    """Count prompt/completion tokens from a LangChain usage_metadata dict"""
+    if not usage:
+        return
+    timer = current_timer.get()
+    for kind, key in (("prompt", "input_tokens"), ("completion", "output_tokens")):
+        value = usage.get(key) or 0
+        LLM_TOKENS.labels(kind).inc(value)
+        if timer is not None:
+            timer.tokens[kind] = timer.tokens.get(kind, 0) + value
+
+
+def record_cache_event(source: str):
+    CACHE_EVENTS.labels(source).inc()
+
+
+def record_route(tier: str, reason: str, model: str):
+    CHAT_ROUTES.labels(tier, reason, model).inc()
+
+
+def record_upstream(upstream: str, outcome: str):
+    UPSTREAM_CALLS.labels(upstream, outcome).inc()
+
+
+def record_admission(outcome: str):
+    ADMISSIONS.labels(outcome).inc()
+
+
+def record_retrieval(path: str, chunks: int):
+    RETRIEVALS.labels(path).inc()
+    RETRIEVED_CHUNKS.observe(chunks)
+
+
+def record_response(response: Dict[str, Any], timer: Optional[RequestTimer] = None):
+    """Count the outcome and, if enabled, attach the stage breakdown"""
+    metadata_info = response.get("metadata_info") or {}
+    RESPONSES.labels(str(bool(metadata_info.get("requires_human"))).lower()).inc()
+    if METRICS_IN_RESPONSE and timer is not None:
+        response["metadata_info"] = {**metadata_info, **timer.breakdown()}
@@ -0,0 +1,68 @@
+from typing import Tuple
+
+from backend.src.utils.price_index import COMPLEX_WORDS, PRICE_INTENT_WORDS, PriceIndex
+from backend.src.utils.text import tokenize
+
+# Whole messages (after tokenizing) that are only a greeting or a thank-you
+GREETING_PHRASES = {
+    "hi", "hello", "hey", "hiya", "greetings", "hi there", "hello there",
+    "hey there", "good morning", "good afternoon", "good evening",
+}  # fmt: skip
+THANKS_PHRASES = {
+    "thanks", "thank you", "thx", "ty", "cheers", "many thanks", "thanks a lot",
+    "thanks so much", "thank you so much", "thank you very much",
+    "much appreciated",
+}  # fmt: skip
+# Service words beyond the package and add-on names in the pricing data
+SERVICE_WORDS = {
+    "bike", "bicycle", "service", "services", "servicing", "repair", "fix",
+    "tune", "tune-up", "maintenance", "package", "packages", "plan", "plans",
+    "book", "booking", "appointment", "warranty", "payment", "pay",
+}  # fmt: skip
+# Messages longer than this are treated as multi-part
+MAX_SIMPLE_TOKENS = 40
+
+TIERS = ("template", "fast", "main")
+
+
+class ModelRouter:
+    """Rule-based classifier that picks the cheapest tier able to answer.
+
+    A greeting or thank-you that opens a conversation gets a canned
+    ``template`` reply; later in a conversation even a short reply may depend
+    on what came before, so it goes to a model. Off-topic and simple
+    single-part questions go to the ``fast`` model. Multi-part pricing
+    questions (several questions, comparisons, several services or long
+    messages) go to the ``main`` model. Instances are immutable, so a rebuilt
+    router can be swapped in with one assignment.
+    """
+
+    def __init__(self, price_index: PriceIndex):
+        self.vocabulary = (
+            frozenset(price_index.packages)
+            | price_index.addon_vocabulary
+            | frozenset(SERVICE_WORDS)
+        )
+
+    def classify(self, message: str, has_history: bool = False) -> Tuple[str, str]:
+        """Return (tier, reason) for a message"""
+        tokens = tokenize(message)
+        words = set(tokens)
+        if not has_history:
+            phrase = " ".join(tokens)
+            if phrase in GREETING_PHRASES:
+                return "template", "greeting"
+            if phrase in THANKS_PHRASES:
+                return "template", "thanks"
+
+        service_words = words & self.vocabulary
+        if not service_words and not words & PRICE_INTENT_WORDS:
+            return "fast", "off_topic"
+        if (
+            message.count("?") > 1
+            or words & COMPLEX_WORDS
+            or len(service_words - {"bike", "bicycle", "service", "services"}) > 2
+            or len(tokens) > MAX_SIMPLE_TOKENS
+        ):
+            return "main", "multi_part"
+        return "fast", "simple"
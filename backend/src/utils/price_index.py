@@ -0,0 +1,153 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.src.utils.pricing import format_price
+
+PRICE_INTENT_WORDS = {
+    "price",
+    "prices",
+    "pricing",
+    "cost",
+    "costs",
+    "much",
+    "fee",
+    "charge",
+    "sgd",
+    "rate",
+}
+# Questions with these words need reasoning or comparison, so they go to RAG
+COMPLEX_WORDS = {
+    "compare",
+    "comparison",
+    "difference",
+    "vs",
+    "versus",
+    "which",
+    "recommend",
+    "should",
+    "better",
+    "cheaper",
+    "and",
+    "or",
+    "include",
+    "includes",
+    "why",
+}
+PLAN_ALIASES = {
+    "one_time": {"one", "onetime", "single", "once"},
+    "annual": {"annual", "annually", "yearly", "year", "subscription"},
+}
+# Generic words in add-on names that don't identify a service on their own
+ADDON_FILLER_WORDS = {"replacement", "standard", "services", "service", "bike", "spd"}
+# Wording of a plain price question. Every other word of a message has to be
+# a price word or belong to the matched package or add-on; anything left
+# over (a negation, quantity, currency, date, another vehicle...) changes the
+# question, so it goes to RAG
+QUESTION_WORDS = {
+    "a", "an", "the", "is", "are", "what", "whats", "s", "how", "does", "do",
+    "it", "its", "of", "for", "to", "in", "my", "me", "i", "please", "can",
+    "could", "you", "tell", "about", "would", "will", "need", "pay", "get",
+    "your", "there", "much",
+}  # fmt: skip
+PACKAGE_WORDS = {
+    "package", "packages", "plan", "plans", "time", "per", "service", "bike",
+}  # fmt: skip
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class PriceIndex:
+    """Precomputed lookup of package and add-on prices from a pricing payload.
+
+    ``match`` recognises direct price questions about one package (optionally
+    one plan) or one add-on and returns a templated answer. A question is only
+    answered when every word in it is accounted for by the price wording and
+    the matched entity; anything else returns ``None`` so the caller falls
+    through to RAG. Instances are
+    immutable, so a rebuilt index can be swapped in with one assignment.
+    """
+
+    def __init__(self, pricing_data: Dict[str, Any]):
+        self.packages: Dict[str, Dict[str, Any]] = {
+            name.lower(): {"name": name, **details}
+            for name, details in pricing_data.get("packages", {}).items()
+        }
+        # (name, price, required keywords, qualifier keywords)
+        self.addons: List[Tuple[str, str, frozenset, frozenset]] = []
+        for services in pricing_data.get("addons", {}).values():
+            for name, price in services.items():
+                qualifier = " ".join(re.findall(r"\(([^)]*)\)", name))
+                base = re.sub(r"\([^)]*\)", " ", name)
+                keywords = frozenset(_tokens(base)) - ADDON_FILLER_WORDS
+                qualifiers = frozenset(_tokens(qualifier)) - keywords
+                if keywords:
+                    self.addons.append(
+                        (name, format_price(price), keywords, qualifiers)
+                    )
+        self.addon_vocabulary = (
+            frozenset().union(*(k | q for _, _, k, q in self.addons))
+            - ADDON_FILLER_WORDS
+        )
+
+    def _match_package(self, words: set) -> Optional[str]:
+        packages = [name for name in self.packages if name in words]
+        if len(packages) != 1:
+            return None
+        package = self.packages[packages[0]]
+        plans = [plan for plan, aliases in PLAN_ALIASES.items() if words & aliases]
+        if len(plans) > 1:
+            return None
+        covered = {packages[0]} | PACKAGE_WORDS
+        for plan in plans:
+            covered |= PLAN_ALIASES[plan]
+        if words - covered:
+            return None
+
+        name = package["name"]
+        if plans == ["one_time"] and "one_time" in package:
+            return f"The **{name}** package costs **{format_price(package['one_time'])}** as a one-time service."
+        if plans == ["annual"] and "annual" in package:
+            return f"The **{name}** annual plan costs **{format_price(package['annual'])}** per year (twice-a-year service)."
+        if not plans and "one_time" in package and "annual" in package:
+            return (
+                f"The **{name}** package costs **{format_price(package['one_time'])}** as a one-time service, "
+                f"or **{format_price(package['annual'])}** per year on the annual plan (twice-a-year service)."
+            )
+        return None
+
+    def _match_addon(self, words: set) -> Optional[str]:
+        scored = []
+        for name, price, keywords, qualifiers in self.addons:
+            if keywords <= words:
+                score = len(keywords) + len(qualifiers & words)
+                scored.append((score, name, price, keywords | qualifiers))
+        if not scored:
+            return None
+        scored.sort(key=lambda item: item[0], reverse=True)
+        if len(scored) > 1 and scored[0][0] == scored[1][0]:
+            return None
+        _, name, price, terms = scored[0]
+        # Words the best match doesn't account for mean the question is about
+        # something more specific (e.g. "Dutch bike tire", "flat tire")
+        if words - terms - ADDON_FILLER_WORDS:
+            return None
+        return f"**{name}** costs **{price}**. Add-ons can be added to any package."
+
+    def match(self, message: str) -> Optional[str]:
+        """Answer a direct price lookup, or return None to fall through to RAG"""
+        if message.count("?") > 1:
+            return None
+        tokens = _tokens(message)
+        words = set(tokens)
+        if len(tokens) > 20 or not words & PRICE_INTENT_WORDS or words & COMPLEX_WORDS:
+            return None
+
+        # Only the words specific to the question are left to account for
+        words -= QUESTION_WORDS | PRICE_INTENT_WORDS
+        package_answer = self._match_package(words)
+        addon_answer = self._match_addon(words)
+        if package_answer and addon_answer:
+            return None
+        return package_answer or addon_answer
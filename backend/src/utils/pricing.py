@@ -0,0 +1,200 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+# Business details that aren't part of the pricing payload
+SERVICE_POLICIES = """Location: Home service across all Singapore, convenient booking, quote → appointment → service at your location (home, carpark, etc.)
+
+Timing: typically 30–90 minutes per bike
+
+Payment: After service, via PayNow or bank transfer; insured by QBE covering liability and product damage
+
+Guarantee: Post-service issues are addressed quickly with follow-up visits. Warranty on parts/service holds."""
+
+# Default BikeHero pricing payload, used until one is pushed to /agent/pricing/
+DEFAULT_PRICING_DATA: Dict[str, Any] = {
+    "packages": {
+        "Essential": {
+            "one_time": 59,
+            "annual": 94,
+            "includes": "Tune brakes, gearing, tires, headset, saddle",
+        },
+        "Advanced": {
+            "one_time": 89,
+            "annual": 142,
+            "includes": "All Essential + cassette/chain/derailleurs/chainring cleaning (excl. BB & hubs)",
+        },
+        "Premium": {
+            "one_time": 129,
+            "annual": 206,
+            "includes": "All Advanced + full wash (frame, wheels, bars, saddle, brakes) (excl. BB & hubs)",
+        },
+    },
+    "addons": {
+        "Tire & Tube Services": {
+            "Inner-tube replacement (standard)": "SGD 29",
+            "Inner-tube (cargo/Dutch bike)": "SGD 39",
+            "Tire replacement": "from SGD 50",
+            "Tire + tube": "from SGD 60",
+            "Cargo/Dutch bike tire": "from SGD 65",
+        },
+        "Wheel & Drivetrain Services": {
+            "Wheel truing": "SGD 40",
+            "Cable & housing (shifter/brake)": "SGD 29–35",
+            "Chain replacement (1–8 spd)": "from SGD 40",
+            "Chain replacement (9-spd)": "SGD 50",
+            "Chain replacement (10-spd)": "SGD 60",
+            "Chain replacement (11-spd)": "SGD 70",
+            "Derailleur (front)": "from SGD 60",
+            "Derailleur (rear)": "from SGD 70",
+            "Shifter": "from SGD 50",
+        },
+        "Brake Services": {
+            "Brake pads (rim)": "from SGD 26",
+            "Brake pads (disc)": "from SGD 35",
+            "Brake bleeding": "SGD 45",
+            "Disk clean": "SGD 30",
+            "Brake lever": "from SGD 35",
+            "Rotor": "from SGD 45",
+        },
+        "Other Services": {
+            "Bike assembly": "SGD 100",
+            "Bike packing": "SGD 100 (box not included)",
+            "Pedals": "SGD 35",
+            "Kickstand": "SGD 35",
+            "Bar tape": "SGD 50",
+            "Grips": "SGD 25",
+        },
+    },
+    "info": {
+        "turnaround": "~2-day turnaround",
+        "annual_savings": "20% versus two one-times",
+    },
+}
+
+
+def pricing_version(pricing_data: Dict[str, Any]) -> str:
+    """Short content hash of a pricing payload, identical in every process"""
+    return hashlib.sha256(
+        json.dumps(pricing_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+class InvalidPricingData(ValueError):
+    """A pricing payload that doesn't have the shape the index is built from"""
+
+
+def validate_pricing_data(pricing_data: Any):
+    """Raise InvalidPricingData unless packages, addons and info are shaped as expected"""
+    if not isinstance(pricing_data, dict):
+        raise InvalidPricingData("pricing data must be an object")
+    for key in ("packages", "addons", "info"):
+        if not isinstance(pricing_data.get(key, {}), dict):
+            raise InvalidPricingData(f"'{key}' must be an object")
+    for name, details in pricing_data.get("packages", {}).items():
+        if not isinstance(details, dict):
+            raise InvalidPricingData(
+                f"packages['{name}'] must be an object with one_time/annual/includes"
+            )
+    for category, services in pricing_data.get("addons", {}).items():
+        if not isinstance(services, dict):
+            raise InvalidPricingData(
+                f"addons['{category}'] must be an object of service name -> price"
+            )
+
+
+def format_price(value: Any) -> str:
+    return f"SGD {value}" if isinstance(value, (int, float)) else str(value)
+
+
+def _label(key: str) -> str:
+    return key.replace("_", " ").capitalize()
+
+
+def pricing_sections(pricing_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Render a pricing payload as titled text sections for retrieval.
+
+    Packages become one overview, each add-on category its own section, and
+    the package descriptions double as recommendations.
+    """
+    packages = pricing_data.get("packages", {})
+    info = pricing_data.get("info", {})
+    sections = []
+
+    if packages:
+        one_time = [
+            f"- {name} – {format_price(details['one_time'])}: {details.get('includes', '')}"
+            for name, details in packages.items()
+            if "one_time" in details
+        ]
+        annual = []
+        for name, details in packages.items():
+            if "annual" not in details:
+                continue
+            line = f"- {name} – {format_price(details['annual'])}"
+            if isinstance(details.get("one_time"), (int, float)) and isinstance(
+                details["annual"], (int, float)
+            ):
+                line += f" (Save {format_price(2 * details['one_time'] - details['annual'])} versus two one-time services)"
+            annual.append(line)
+        content = f"Bike Hero offers {len(packages)} tiers for both one-time and annual service plans. All include parts, transport, and labor."
+        if one_time:
+            content += "\n\nOne‑Time Services:\n" + "\n".join(one_time)
+        if annual:
+            content += "\n\nAnnual Packages – Twice‑a‑Year Service:\n" + "\n".join(
+                annual
+            )
+            content += "\n\nAnnual services include the same scopes as one-time, but performed twice yearly."
+        if info:
+            content += "\n\n" + "\n".join(
+                f"- {_label(key)}: {value}" for key, value in info.items()
+            )
+        sections.append(
+            {
+                "title": "Service Packages Overview",
+                "content": content,
+                "section": "packages",
+            }
+        )
+
+    for category, services in pricing_data.get("addons", {}).items():
+        lines = "\n".join(
+            f"- {name}: {format_price(price)}" for name, price in services.items()
+        )
+        sections.append(
+            {
+                "title": f"Add-On Services Pricing: {category}",
+                "content": f"These can be added to any package for specific repairs:\n\n{lines}",
+                "section": "addons",
+            }
+        )
+
+    sections.append(
+        {
+            "title": "Service Features & Policies",
+            "content": SERVICE_POLICIES,
+            "section": "policies",
+        }
+    )
+
+    if packages:
+        lines = [
+            f"- {details['includes']} → {name}"
+            for name, details in packages.items()
+            if details.get("includes")
+        ]
+        lines.append(
+            f"- Regular rider? Annual plans save {info['annual_savings']}"
+            if "annual_savings" in info
+            else "- Regular rider? Annual plans cost less than two one-time services"
+        )
+        lines.append("- Have specific parts or repairs? Add‑ons are modular")
+        sections.append(
+            {
+                "title": "Service Recommendations",
+                "content": "Choosing recommendations:\n\n" + "\n".join(lines),
+                "section": "recommendations",
+            }
+        )
+
+    return sections
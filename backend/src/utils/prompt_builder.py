@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from loguru import logger
+
+# Fixed overhead OpenAI adds per chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Older turns that don't fit whole are kept as one-line snippets of this size
+SUMMARY_TOKENS = 24
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, or approximates (~4 chars per token) when the
+    encoding can't be loaded, e.g. without network access on first use."""
+
+    def __init__(self, model_name: str = "gpt-4.1-mini"):
+        self.model_name = model_name
+        self._encoding = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            import tiktoken
+
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model_name)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, approximating token counts: {e}")
+
+    def count(self, text: str) -> int:
+        if not self._loaded:
+            self._load()
+        if self._encoding is None:
+            return (len(text) + 3) // 4
+        return len(self._encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is None:
+            return text[: max_tokens * 4].rstrip() + "…"
+        return self._encoding.decode(self._encoding.encode(text)[:max_tokens]) + "…"
+
+
+class PromptBuilder:
+    """Fits system prompt, retrieved context and chat history into a token budget.
+
+    The system prompt and the question are always included. Retrieved chunks
+    are added in rank order while they fit, then history from the newest turn
+    back; turns that no longer fit whole are reduced to short snippets, and
+    the rest are dropped.
+    """
+
+    def __init__(self, token_budget: int, counter: Optional[TokenCounter] = None):
+        self.token_budget = token_budget
+        self.counter = counter or TokenCounter()
+
+    def build(
+        self,
+        system_prompt: str,
+        context_chunks: List[str],
+        message: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+    ):
+        """Return the prompt messages and their estimated token count"""
+        count = self.counter.count
+        used = (
+            count(system_prompt)
+            + count(f"User Question: {message}")
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+
+        context = []
+        for chunk in context_chunks:
+            cost = count(chunk) + 2
+            if context and used + cost > self.token_budget:
+                break
+            context.append(chunk)
+            used += cost
+
+        history_lines = []
+        for entry in reversed(chat_history or []):
+            line = f"{entry.get('role', 'user').title()}: {entry.get('content', '')}"
+            cost = count(line) + 1
+            if used + cost > self.token_budget:
+                line = self.counter.truncate(line, SUMMARY_TOKENS)
+                cost = count(line) + 1
+                if used + cost > self.token_budget:
+                    break
+            history_lines.append(line)
+            used += cost
+        history_lines.reverse()
+
+        sections = ["Pricing Information:\n" + "\n\n".join(context)]
+        if history_lines:
+            sections.append("Chat History:\n" + "\n".join(history_lines))
+        sections.append(f"User Question: {message}")
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="\n\n".join(sections)),
+        ]
+        return messages, used
@@ -0,0 +1,342 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import numpy as np
+from loguru import logger
+
+from backend.src.utils.metrics import CIRCUIT_STATE, record_upstream
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+
+@lru_cache(maxsize=1)
+def retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """Errors worth another attempt; anything else (bad request, auth) fails at once.
+
+    The openai SDK is imported on first use rather than at module import.
+    """
+    import openai
+
+    return (
+        asyncio.TimeoutError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt + 1``"""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_sync(
+    name: str,
+    fn: Callable[[], Any],
+    max_retries: int = 2,
+    backoff_base: float = 0.2,
+    backoff_max: float = 2.0,
+) -> Any:
+    """Call ``fn``, retrying retryable errors with backoff.
+
+    ``fn`` runs in the calling thread and the backoff sleeps block it, so call
+    this off the event loop. For bulk calls off the request path (document
+    embedding during ingestion, which runs in ``asyncio.to_thread``), which
+    have no deadline or circuit breaker.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            result = fn()
+        except retryable_errors():
+            record_upstream(name, "error")
+            if attempt == max_retries:
+                raise
+            record_upstream(name, "retried")
+            time.sleep(backoff_delay(attempt, backoff_base, backoff_max))
+            continue
+        except Exception:
+            record_upstream(name, "error")
+            raise
+        record_upstream(name, "success")
+        return result
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then one probe call is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _GAUGE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(self._GAUGE_VALUES[state])
+
+    def is_open(self) -> bool:
+        """Whether calls are being rejected right now (doesn't start a probe)"""
+        return (
+            self.state != self.CLOSED
+            and time.monotonic() - self.opened_at < self.reset_timeout
+        )
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if self.state == self.CLOSED:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        # One probe per reset window, so a lost probe can't wedge the circuit
+        self.opened_at = time.monotonic()
+        self._set_state(self.HALF_OPEN)
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class ResilientCall:
+    """Deadline, retries, optional hedging and a circuit breaker for one upstream.
+
+    Each attempt is cancelled after ``timeout`` seconds. Retryable errors are
+    retried up to ``max_retries`` times with full-jitter exponential backoff.
+    With ``hedge_percentile`` set, an attempt still running past that
+    percentile of recent latencies gets a second, identical request and the
+    first to succeed wins. Calls are rejected with ``CircuitOpenError`` while
+    the breaker is open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(name)
+        self.latencies: deque = deque(maxlen=500)
+        self.counts: Dict[str, int] = {}
+
+    def _count(self, outcome: str):
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        record_upstream(self.name, outcome)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if (
+            self.hedge_percentile is None
+            or len(self.latencies) < self.hedge_min_samples
+        ):
+            return None
+        return float(np.percentile(self.latencies, self.hedge_percentile))
+
+    async def _backoff(self, attempt: int):
+        await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], delay: float):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pending = {asyncio.ensure_future(fn())}
+        hedge = None
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(
+                        f"{self.name} call timed out after {self.timeout}s"
+                    )
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining if hedge else min(delay, remaining),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                error = None
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_won")
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                if hedge is None and not done:
+                    self._count("hedged")
+                    hedge = asyncio.ensure_future(fn())
+                    pending.add(hedge)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]]):
+        start = time.perf_counter()
+        delay = self._hedge_delay()
+        if delay is None:
+            try:
+                result = await asyncio.wait_for(fn(), self.timeout)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(
+                    f"{self.name} call timed out after {self.timeout}s"
+                ) from None
+        else:
+            result = await self._hedged(fn, delay)
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def _reject(self):
+        self._count("rejected")
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` (a zero-argument coroutine factory) under the policy"""
+        if not self.breaker.allow():
+            self._reject()
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await self._attempt(fn)
+            except retryable_errors() as e:
+                self._count(
+                    "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                )
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                self._count("retried")
+                await self._backoff(attempt)
+                continue
+            except Exception:
+                self._count("error")
+                self.breaker.record_failure()
+                raise
+            self._count("success")
+            self.breaker.record_success()
+            return result
+
+    async def stream(self, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Guard a streaming call: deadline and retries apply up to the first item.
+
+        After that each further item must arrive within ``timeout`` of the
+        previous one; a stalled stream is cut off with ``asyncio.TimeoutError``
+        and counts as a failure (it can't be retried once items were yielded).
+        """
+        if not self.breaker.allow():
+            self._reject()
+        for attempt in range(self.max_retries + 1):
+            iterator = fn().__aiter__()
+            try:
+                first = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+                break
+            except StopAsyncIteration:
+                self._count("success")
+                self.breaker.record_success()
+                return
+            except retryable_errors() as e:
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+                self._count(
+                    "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                )
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                self._count("retried")
+                await self._backoff(attempt)
+            except Exception:
+                self._count("error")
+                self.breaker.record_failure()
+                raise
+
+        yield first
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                yield item
+        except asyncio.TimeoutError:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            self._count("timeout")
+            self.breaker.record_failure()
+            raise asyncio.TimeoutError(
+                f"{self.name} stream stalled for {self.timeout}s"
+            ) from None
+        except Exception:
+            self._count("error")
+            self.breaker.record_failure()
+            raise
+        self._count("success")
+        self.breaker.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.stats(),
+            "calls": dict(self.counts),
+            "hedge_delay_ms": (
+                round(self._hedge_delay() * 1000, 3)
+                if self._hedge_delay() is not None
+                else None
+            ),
+        }
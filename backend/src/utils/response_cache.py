@@ -0,0 +1,126 @@
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class ResponseCache:
+    """TTL/LRU cache of agent responses keyed by normalized question and pricing version.
+
+    Lookups are exact on the normalized question; when ``semantic_threshold`` is
+    set, a question whose embedding has cosine similarity at or above the
+    threshold with a cached one is also served. Entries for any other pricing
+    version are dropped by ``invalidate``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        semantic_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        # key -> (response, normalized embedding or None, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return " ".join(re.sub(r"[^\w\s]", " ", message.lower()).split())
+
+    def _hit(self, key: str, entry: tuple, kind: str) -> Dict[str, Any]:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        response = copy.deepcopy(entry[0])
+        response["metadata_info"]["cache_hit"] = kind
+        return response
+
+    def get(self, message: str, version: str) -> Optional[Dict[str, Any]]:
+        """Exact-match lookup on the normalized question"""
+        key = self.normalize(message)
+        with self._lock:
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                if self.semantic_threshold is None:
+                    self.misses += 1
+                return None
+            return self._hit(key, entry, "exact")
+
+    def get_similar(
+        self, embedding: List[float], version: str
+    ) -> Optional[Dict[str, Any]]:
+        """Semantic lookup: best cached question above the similarity threshold"""
+        if self.semantic_threshold is None:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry[1] is not None and entry[2] >= now
+            ]
+            if version != self.version or not candidates:
+                self.misses += 1
+                return None
+            scores = np.stack([entry[1] for _, entry in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.semantic_threshold:
+                self.misses += 1
+                return None
+            key, entry = candidates[best]
+            return self._hit(key, entry, "semantic")
+
+    def set(
+        self,
+        message: str,
+        version: str,
+        response: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+    ):
+        """Store a response for the given pricing version"""
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+        with self._lock:
+            if version != self.version:
+                return
+            key = self.normalize(message)
+            self._entries[key] = (
+                copy.deepcopy(response),
+                vector,
+                time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, version: str):
+        """Drop every entry and start caching for a new pricing version"""
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "version": self.version,
+        }
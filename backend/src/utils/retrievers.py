@@ -0,0 +1,296 @@
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class RetrieverBackend(ABC):
+    """Storage and nearest-neighbour search for embedded pricing chunks"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    @abstractmethod
+    def get_ids(self) -> Set[str]:
+        """Return the IDs of every stored chunk"""
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+    ):
+        """Store documents, replacing any with the same ID; embeds them unless ``vectors`` are given"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove documents by ID"""
+
+    @abstractmethod
+    def search_by_vector_with_scores(
+        self, embedding: List[float], k: int = 3, section: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        """Return the k closest chunks with cosine similarity, optionally within one section"""
+
+    def search_by_vector(
+        self, embedding: List[float], k: int = 3, section: Optional[str] = None
+    ) -> List[Document]:
+        """Return the k chunks closest to the embedding, optionally within one section"""
+        return [
+            doc for doc, _ in self.search_by_vector_with_scores(embedding, k, section)
+        ]
+
+    def sibling_collections(self) -> List[str]:
+        """Names of the other collections kept in the same storage"""
+        return []
+
+    def drop_collection(self, name: str):
+        """Delete a sibling collection and everything in it"""
+
+
+class ChromaRetriever(RetrieverBackend):
+    """Persistent Chroma collection on local disk"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        persist_directory: str = "./chroma_db",
+        collection_name: Optional[str] = None,
+    ):
+        # Imported here so chromadb only loads when this backend is used
+        from langchain_community.vectorstores import Chroma
+
+        super().__init__(embeddings)
+        collection_args = (
+            {"collection_name": collection_name} if collection_name else {}
+        )
+        self.vectorstore = Chroma(
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+            **collection_args,
+        )
+
+    def get_ids(self) -> Set[str]:
+        return set(self.vectorstore.get(include=[])["ids"])
+
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+    ):
+        if vectors is None:
+            self.vectorstore.add_documents(documents, ids=ids)
+            return
+        self.vectorstore._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+        )
+
+    def delete(self, ids: List[str]):
+        self.vectorstore.delete(ids=ids)
+
+    def search_by_vector_with_scores(
+        self, embedding: List[float], k: int = 3, section: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k, filter={"section": section} if section else None
+        )
+        # Chroma returns squared L2 distance, which is 2 - 2*cos for unit vectors
+        return [(doc, 1 - distance / 2) for doc, distance in results]
+
+    def sibling_collections(self) -> List[str]:
+        client = self.vectorstore._client
+        # chromadb < 0.6 returns Collection objects, later versions names
+        return [
+            getattr(collection, "name", collection)
+            for collection in client.list_collections()
+            if getattr(collection, "name", collection)
+            != self.vectorstore._collection.name
+        ]
+
+    def drop_collection(self, name: str):
+        self.vectorstore._client.delete_collection(name)
+
+
+class NumpyRetriever(RetrieverBackend):
+    """In-memory backend for small corpora.
+
+    Normalized embeddings are kept in one contiguous float32 matrix and searched
+    with a single dot product. When ``snapshot_directory`` is set the matrix is
+    written to ``embeddings.npy`` (memory-mapped on load) next to a JSON file
+    holding the IDs and documents.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, snapshot_directory: Optional[str] = None
+    ):
+        super().__init__(embeddings)
+        self.snapshot_directory = snapshot_directory
+        # (ids, documents, matrix) is replaced as a whole so readers never see
+        # a partially updated index
+        self._state = ([], [], np.empty((0, 0), dtype=np.float32))
+        if snapshot_directory:
+            self._load_snapshot()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def get_ids(self) -> Set[str]:
+        return set(self._state[0])
+
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[Document],
+        vectors: Optional[List[List[float]]] = None,
+    ):
+        if not ids:
+            return
+        if vectors is None:
+            vectors = self.embeddings.embed_documents(
+                [doc.page_content for doc in documents]
+            )
+        vectors = np.asarray(vectors, dtype=np.float32)
+        replaced = set(ids)
+        old_ids, old_docs, old_matrix = self._state
+        keep = [i for i, doc_id in enumerate(old_ids) if doc_id not in replaced]
+        new_ids = [old_ids[i] for i in keep] + list(ids)
+        new_docs = [old_docs[i] for i in keep] + list(documents)
+        parts = [self._normalize(vectors)]
+        if keep:
+            parts.insert(0, old_matrix[keep])
+        self._state = (new_ids, new_docs, np.ascontiguousarray(np.vstack(parts)))
+        self._save_snapshot()
+
+    def delete(self, ids: List[str]):
+        removed = set(ids)
+        old_ids, old_docs, old_matrix = self._state
+        keep = [i for i, doc_id in enumerate(old_ids) if doc_id not in removed]
+        matrix = (
+            np.ascontiguousarray(old_matrix[keep])
+            if keep
+            else np.empty((0, old_matrix.shape[1]), dtype=np.float32)
+        )
+        self._state = ([old_ids[i] for i in keep], [old_docs[i] for i in keep], matrix)
+        self._save_snapshot()
+
+    def search_by_vector_with_scores(
+        self, embedding: List[float], k: int = 3, section: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        ids, documents, matrix = self._state
+        if not ids:
+            return []
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        scores = matrix @ query
+        if section:
+            mask = np.array(
+                [doc.metadata.get("section") == section for doc in documents]
+            )
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, len(ids))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(documents[i], float(scores[i])) for i in top]
+
+    def sibling_collections(self) -> List[str]:
+        if not self.snapshot_directory:
+            return []
+        parent, own = os.path.split(os.path.normpath(self.snapshot_directory))
+        if not os.path.isdir(parent):
+            return []
+        return [
+            name
+            for name in os.listdir(parent)
+            if name != own and os.path.isdir(os.path.join(parent, name))
+        ]
+
+    def drop_collection(self, name: str):
+        parent = os.path.dirname(os.path.normpath(self.snapshot_directory))
+        shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+    def _snapshot_paths(self):
+        return (
+            os.path.join(self.snapshot_directory, "embeddings.npy"),
+            os.path.join(self.snapshot_directory, "documents.json"),
+        )
+
+    def _save_snapshot(self):
+        if not self.snapshot_directory:
+            return
+        os.makedirs(self.snapshot_directory, exist_ok=True)
+        matrix_path, documents_path = self._snapshot_paths()
+        ids, documents, matrix = self._state
+        # Write then rename, so an existing memory map keeps its old file; the
+        # temp name is per process, as several workers may share the directory
+        suffix = f".{os.getpid()}.tmp"
+        with open(matrix_path + suffix, "wb") as f:
+            np.save(f, matrix)
+        with open(documents_path + suffix, "w") as f:
+            json.dump(
+                [
+                    {
+                        "id": doc_id,
+                        "page_content": doc.page_content,
+                        "metadata": doc.metadata,
+                    }
+                    for doc_id, doc in zip(ids, documents)
+                ],
+                f,
+            )
+        os.replace(matrix_path + suffix, matrix_path)
+        os.replace(documents_path + suffix, documents_path)
+
+    def _load_snapshot(self):
+        matrix_path, documents_path = self._snapshot_paths()
+        if not (os.path.exists(matrix_path) and os.path.exists(documents_path)):
+            return
+        with open(documents_path) as f:
+            records = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r")
+        self._state = (
+            [record["id"] for record in records],
+            [
+                Document(
+                    page_content=record["page_content"], metadata=record["metadata"]
+                )
+                for record in records
+            ],
+            matrix,
+        )
+
+
+def create_retriever(
+    backend: str,
+    embeddings: Embeddings,
+    persist_directory: str = "./chroma_db",
+    snapshot_directory: Optional[str] = None,
+    collection_name: Optional[str] = None,
+) -> RetrieverBackend:
+    """Build the configured retriever backend ("chroma" or "numpy").
+
+    A ``collection_name`` keeps vectors from a different embedding model or
+    pricing version in their own Chroma collection or snapshot subdirectory.
+    """
+    if backend == "chroma":
+        return ChromaRetriever(embeddings, persist_directory, collection_name)
+    if backend == "numpy":
+        if snapshot_directory and collection_name:
+            snapshot_directory = os.path.join(snapshot_directory, collection_name)
+        return NumpyRetriever(embeddings, snapshot_directory)
+    raise ValueError(f"Unknown vector backend: {backend}")
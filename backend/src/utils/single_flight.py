@@ -0,0 +1,65 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls onto one shared task.
+
+    The first caller for a key (the leader) starts the work; callers arriving
+    while it is in flight await the same task. The task is shielded, so a
+    cancelled caller doesn't cancel the work for the others.
+    """
+
+    def __init__(self, max_tracked_keys: int = 1000):
+        self.max_tracked_keys = max_tracked_keys
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        # key -> [executions, coalesced callers], most recent keys last
+        self._per_key: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.executions = 0
+        self.coalesced = 0
+
+    def _record(self, key: Hashable, leader: bool):
+        counts = self._per_key.pop(key, [0, 0])
+        counts[0 if leader else 1] += 1
+        self._per_key[key] = counts
+        while len(self._per_key) > self.max_tracked_keys:
+            self._per_key.popitem(last=False)
+        if leader:
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight key; returns (result, whether this caller led)"""
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self._record(key, leader)
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task), leader
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.executions + self.coalesced
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "dedup_ratio": self.coalesced / total if total else 0.0,
+            "in_flight": {str(key): count for key, count in self._waiters.items()},
+            "per_key": {
+                str(key): {"executions": counts[0], "coalesced": counts[1]}
+                for key, counts in self._per_key.items()
+            },
+        }
@@ -0,0 +1,61 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class StartupReport:
+    """Wall-clock breakdown of process boot, from module import to ready.
+
+    Phases may overlap (the agent warms up in the background while the
+    server is already accepting connections), so they don't sum to the total.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.retries = 0
+        self.last_retry_error: Optional[str] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+        logger.info(f"Startup report: {self.as_dict()}")
+
+    def record_retry(self, error: str):
+        self.retries += 1
+        self.last_retry_error = error
+
+    def mark_failed(self, error: str):
+        self.error = error
+
+    def as_dict(self) -> Dict[str, Any]:
+        report = {
+            "phases_ms": {
+                name: round(seconds * 1000, 1) for name, seconds in self.phases.items()
+            },
+            "time_to_ready_ms": (
+                round((self.ready_at - self.started_at) * 1000, 1)
+                if self.ready_at is not None
+                else None
+            ),
+        }
+        if self.retries:
+            report["retries"] = self.retries
+            report["last_retry_error"] = self.last_retry_error
+        if self.error:
+            report["error"] = self.error
+        return report
@@ -0,0 +1,11 @@
+import re
+from typing import List
+
+TOKEN_PATTERN = re.compile(r"\$?[a-z0-9]+(?:[-./][a-z0-9]+)*")
+# The pricing copy uses non-breaking and en/em dashes ("11‑spd", "SGD 29–35")
+DASHES = str.maketrans({c: "-" for c in "\u2010\u2011\u2012\u2013\u2014"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping hyphenated terms like "11-spd" whole"""
+    return TOKEN_PATTERN.findall(text.lower().translate(DASHES))
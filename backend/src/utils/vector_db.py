@@ -1,176 +1,531 @@
+import asyncio
+import contextlib
+import hashlib
+import json
 import os
-from typing import Any, Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
 from loguru import logger
 
+from backend.src.utils.bm25 import BM25Index
+from backend.src.utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+from backend.src.utils.llm import EMBEDDING_BACKEND, create_embeddings
+from backend.src.utils.metrics import record_retrieval, stage
+from backend.src.utils.pricing import (
+    DEFAULT_PRICING_DATA,
+    pricing_sections,
+    pricing_version,
+)
+from backend.src.utils.resilience import ResilientCall, retry_sync
+from backend.src.utils.retrievers import RetrieverBackend, create_retriever
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+VECTOR_SEARCH_WORKERS = int(os.getenv("VECTOR_SEARCH_WORKERS", "4"))
+RETRIEVAL_CONCURRENCY = int(os.getenv("RETRIEVAL_CONCURRENCY", "16"))
+# "chroma" (persistent) or "numpy" (in-memory, optional .npy snapshot)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_SNAPSHOT_DIR = os.getenv("VECTOR_SNAPSHOT_DIR")
+# "hybrid" (BM25 fused with vector search) or "vector" (vector search only)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Upper bound on context chunks; hybrid mode returns fewer when scores drop off
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", "3"))
+# Share of the fused score that comes from BM25 (the rest from vector similarity)
+HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "0.5"))
+# Chunks scoring below this fraction of the best one are dropped
+RETRIEVAL_RELATIVE_CUTOFF = float(os.getenv("RETRIEVAL_RELATIVE_CUTOFF", "0.5"))
+# Chroma's default collection, used before each pricing version had its own
+LEGACY_CHROMA_COLLECTION = "langchain"
+# Vector hits below this similarity are never used (unset: no floor; the
+# scale depends on the embedding model)
+RETRIEVAL_MIN_SIMILARITY = os.getenv("RETRIEVAL_MIN_SIMILARITY")
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "5"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "2"))
+# Latency percentile after which a second, hedged request is sent; unset disables
+EMBEDDING_HEDGE_PERCENTILE = os.getenv("EMBEDDING_HEDGE_PERCENTILE")
+# Chunks per embedding request when ingesting pricing, and requests in flight
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+
+
+class SearchIndex(NamedTuple):
+    """Vector store and keyword index for one pricing version, swapped in as a unit"""
+
+    version: str
+    vectorstore: RetrieverBackend
+    keyword_index: BM25Index
+
 
 class VectorDBManager:
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        max_concurrency: int = RETRIEVAL_CONCURRENCY,
+        backend: str = VECTOR_BACKEND,
+        retrieval_mode: str = RETRIEVAL_MODE,
+    ):
         self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"))
-        self.vectorstore = None
+        self.backend = backend
+        self.retrieval_mode = retrieval_mode
+        self.embedding_backend = EMBEDDING_BACKEND
+        if self.embedding_backend == "local":
+            # Recomputing a local vector is cheaper than looking it up
+            self.embeddings = create_embeddings()
+            # Local vectors have their own dimensions, so keep them apart
+            self.collection_name = f"pricing_{self.embeddings.model}"
+        else:
+            # Content-addressed cache so unchanged chunks are never re-embedded
+            self.embeddings = CachedEmbeddings(
+                create_embeddings(),
+                EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES),
+            )
+            self.collection_name = None
+        # Query embeddings are on the request path, so they get a deadline,
+        # retries and a circuit breaker
+        self.embedding_guard = ResilientCall(
+            "embeddings",
+            timeout=EMBEDDING_TIMEOUT_SECONDS,
+            max_retries=EMBEDDING_MAX_RETRIES,
+            hedge_percentile=(
+                float(EMBEDDING_HEDGE_PERCENTILE)
+                if EMBEDDING_HEDGE_PERCENTILE
+                else None
+            ),
+        )
+        self.index: Optional[SearchIndex] = None
+        self._previous_collection: Optional[str] = None
+        # Collections this process may search (or is building), advertised to
+        # other workers sharing the storage so their prune leaves them alone.
+        # Changed by build_index (in a worker thread) and activate, so locked
+        self._leased: Set[str] = set()
+        self._building: Set[str] = set()
+        self._lease_lock = threading.Lock()
+        # The pre-versioning store is removed once per process, see prune()
+        self._legacy_removed = False
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""],
         )
+        # Vector search is blocking, so it runs on a small dedicated pool and
+        # the number of in-flight retrievals is capped
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=VECTOR_SEARCH_WORKERS, thread_name_prefix="vector-search"
+        )
+        self._retrieval_semaphore = asyncio.Semaphore(max_concurrency)
 
     def create_documents_from_pricing_data(
         self, pricing_data: Dict[str, Any]
     ) -> List[Document]:
-        """Convert pricing data into documents for vector storage, preserving section context"""
+        """Convert pricing data into chunked documents, each chunk keeping its section title"""
         documents = []
+        for section in pricing_sections(pricing_data):
+            for chunk in self.text_splitter.split_text(section["content"]):
+                documents.append(
+                    Document(
+                        page_content=f"{section['title']}\n\n{chunk}",
+                        metadata={
+                            "source": "bikehero_pricing",
+                            "section": section["section"],
+                            "section_title": section["title"],
+                            "chunk_id": len(documents),
+                        },
+                    )
+                )
+        return documents
+
+    @staticmethod
+    def document_id(doc: Document) -> str:
+        """Deterministic ID from the chunk's position and a hash of its content"""
+        content_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        metadata = doc.metadata
+        return f"{metadata['source']}:{metadata['section']}:{metadata['chunk_id']}:{content_hash[:16]}"
+
+    def _collection_for(self, version: str) -> str:
+        return f"{self.collection_name or 'pricing'}-{version}"
 
-        # Create separate documents for each logical section
-        sections = [
-            {
-                "title": "Service Packages Overview",
-                "content": """Bike Hero offers three tiers for both one-time and annual service plans. All include parts, transport, and labor.
-
-One‑Time Services (completed within 2 days):
-- Essential – SGD 59: Basic safety check & tune (brakes, gearing, tires, headset, saddle). Add‑on repairs extra.
-- Advanced – SGD 89: Includes Essential + drivetrain cleaning (cassette, chain, derailleurs, chainring). Excludes bottom bracket/hubs.
-- Premium – SGD 129: Advanced + full bike wash (frame, wheels, handlebar, saddle, brakes disc/rim). Excludes bottom bracket/hubs.
-
-Annual Packages – Twice‑a‑Year Service + ~20% Savings:
-- Essential – SGD 94 (Save SGD 24)
-- Advanced – SGD 142 (Save SGD 36)
-- Premium – SGD 206 (Save SGD 51)
-
-Annual services include the same scopes as one-time, but performed twice yearly.""",
-                "section": "packages",
-            },
-            {
-                "title": "Add-On Services Pricing",
-                "content": """Add‑On / Ad‑Hoc Services - These can be added to any package for specific repairs:
-
-Tire & Tube Services:
-- Inner-tube replacement (standard): SGD 29
-- Inner-tube (cargo/Dutch bike): SGD 39
-- Tire replacement: from SGD 50
-- Tire + tube: from SGD 60
-- Cargo/Dutch bike tire: from SGD 65
-
-Wheel & Drivetrain Services:
-- Wheel truing: SGD 40
-- Cable & housing (shifter/brake): SGD 29–35
-- Chain replacement (1–8 spd): from SGD 40; 9‑spd: SGD 50; 10‑spd: SGD 60; 11‑spd: SGD 70
-- Derailleur (front): from SGD 60; (rear): from SGD 70
-- Shifter: from SGD 50
-
-Brake Services:
-- Brake pads (rim): from SGD 26; (disc): from SGD 35
-- Brake bleeding: SGD 45; disk clean: SGD 30
-- Brake lever: from SGD 35; Rotor: from SGD 45
-
-Other Services:
-- Bike assembly: SGD 100
-- Bike packing: SGD 100 (box not included)
-- Pedals: SGD 35; Kickstand: SGD 35; Bar tape: SGD 50; Grips: SGD 25""",
-                "section": "addons",
-            },
-            {
-                "title": "Service Features & Policies",
-                "content": """Service Features & Policies:
-
-Location: Home service across all Singapore, convenient booking, quote → appointment → service at your location (home, carpark, etc.)
-
-Timing: typically 30–90 minutes per bike
-
-Payment: After service, via PayNow or bank transfer; insured by QBE covering liability and product damage
-
-Guarantee: Post-service issues are addressed quickly with follow-up visits. Warranty on parts/service holds.""",
-                "section": "policies",
-            },
-            {
-                "title": "Service Recommendations",
-                "content": """Choosing recommendations:
-
-- Safety-focused or basic tune → go for Essential
-- Want drivetrain clean too → Advanced
-- Prefer a deep clean + full wash → Premium
-- Regular rider? Annual plans often save ~20%
-- Have specific parts or repairs? Add‑ons are modular""",
-                "section": "recommendations",
-            },
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of INGEST_BATCH_SIZE, up to INGEST_CONCURRENCY at a time"""
+        batches = [
+            texts[i : i + INGEST_BATCH_SIZE]
+            for i in range(0, len(texts), INGEST_BATCH_SIZE)
         ]
+        if len(batches) <= 1:
+            return self._embed_batch(texts) if texts else []
+        with ThreadPoolExecutor(
+            max_workers=min(INGEST_CONCURRENCY, len(batches)),
+            thread_name_prefix="ingest-embedding",
+        ) as executor:
+            return [
+                vector
+                for vectors in executor.map(self._embed_batch, batches)
+                for vector in vectors
+            ]
 
-        # Create documents from each section
-        for i, section in enumerate(sections):
-            doc = Document(
-                page_content=f"{section['title']}\n\n{section['content']}",
-                metadata={
-                    "source": "bikehero_pricing",
-                    "section": section["section"],
-                    "section_title": section["title"],
-                    "chunk_id": i,
-                },
-            )
-            documents.append(doc)
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # The client itself doesn't retry (see create_embeddings)
+        return retry_sync(
+            "embeddings_ingest",
+            lambda: self.embeddings.embed_documents(texts),
+            max_retries=EMBEDDING_MAX_RETRIES,
+        )
 
-        return documents
+    def sync_documents(
+        self, store: RetrieverBackend, documents: List[Document]
+    ) -> Dict[str, int]:
+        """Embed and upsert chunks missing from the store and delete those no longer present"""
+        new_docs = {self.document_id(doc): doc for doc in documents}
+        stored_ids = store.get_ids()
 
-    def initialize_vectorstore(self, pricing_data: Dict[str, Any] = None):
-        """Initialize the vector store with pricing data"""
-        if pricing_data is None:
-            # Use default pricing data
-            pricing_data = {
-                "packages": {
-                    "Essential": {
-                        "one_time": 59,
-                        "annual": 94,
-                        "includes": "Tune brakes, gearing, tires, headset, saddle",
-                    },
-                    "Advanced": {
-                        "one_time": 89,
-                        "annual": 142,
-                        "includes": "All Essential + cassette/chain/derailleurs/chainring cleaning (excl. BB & hubs)",
-                    },
-                    "Premium": {
-                        "one_time": 129,
-                        "annual": 206,
-                        "includes": "All Advanced + full wash (frame, wheels, bars, saddle, brakes) (excl. BB & hubs)",
-                    },
-                },
-                "info": {
-                    "turnaround": "~2-day turnaround",
-                    "annual_savings": "20% versus two one-times",
-                },
-            }
+        to_add = [doc_id for doc_id in new_docs if doc_id not in stored_ids]
+        to_delete = [doc_id for doc_id in stored_ids if doc_id not in new_docs]
+
+        if to_delete:
+            store.delete(to_delete)
+        if to_add:
+            added = [new_docs[doc_id] for doc_id in to_add]
+            vectors = self.embed_documents([doc.page_content for doc in added])
+            store.upsert(to_add, added, vectors)
+
+        logger.info(
+            f"Vector store sync: {len(to_add)} upserted, {len(to_delete)} deleted, "
+            f"{len(new_docs) - len(to_add)} unchanged"
+        )
+        return {
+            "upserted": len(to_add),
+            "deleted": len(to_delete),
+            "unchanged": len(new_docs) - len(to_add),
+        }
+
+    def build_index(
+        self, pricing_data: Dict[str, Any], version: Optional[str] = None
+    ) -> Tuple[SearchIndex, Dict[str, Any]]:
+        """Build a search index for a pricing payload without touching the live one.
+
+        Each version gets its own collection (or snapshot directory), named by
+        its content hash, so a restart or another worker finds the chunks
+        already embedded. Returns the index and a build report.
+        """
+        version = version or pricing_version(pricing_data)
+        timings = {}
+        started = time.perf_counter()
 
         documents = self.create_documents_from_pricing_data(pricing_data)
+        timings["documents"] = time.perf_counter() - started
+
+        mark = time.perf_counter()
+        # Leased before it exists, so another worker's prune can't drop it
+        # between the build and activate()
+        collection = self._collection_for(version)
+        with self._lease_lock:
+            self._building.add(collection)
+            self._leased.add(collection)
+            self._write_lease()
+        try:
+            live = self.index
+            if live is not None and live.version == version:
+                # Same content as the live index: resync its store, which finds
+                # nothing to do, rather than opening (or re-embedding) a new one
+                store = live.vectorstore
+            else:
+                store = create_retriever(
+                    self.backend,
+                    self.embeddings,
+                    persist_directory=self.persist_directory,
+                    snapshot_directory=VECTOR_SNAPSHOT_DIR,
+                    collection_name=self._collection_for(version),
+                )
+            timings["open_store"] = time.perf_counter() - mark
 
-        logger.info(f"vector store documents: {documents}")
+            mark = time.perf_counter()
+            counts = self.sync_documents(store, documents)
+            timings["embed_and_store"] = time.perf_counter() - mark
 
-        # Create or load the vector store
-        self.vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory,
+            mark = time.perf_counter()
+            keyword_index = BM25Index(documents)
+            timings["keyword_index"] = time.perf_counter() - mark
+            timings["total"] = time.perf_counter() - started
+
+            report = {
+                "version": version,
+                "chunks": len(documents),
+                **counts,
+                "timings_ms": {
+                    name: round(seconds * 1000, 3) for name, seconds in timings.items()
+                },
+            }
+            logger.info(f"Built search index {version}: {report}")
+            return SearchIndex(version, store, keyword_index), report
+        except BaseException:
+            with self._lease_lock:
+                self._building.discard(collection)
+            raise
+
+    def _lease_directory(self) -> Optional[str]:
+        root = (
+            VECTOR_SNAPSHOT_DIR if self.backend == "numpy" else self.persist_directory
         )
+        return os.path.join(root, ".serving") if root else None
+
+    def _write_lease(self):
+        """Record this process's collections in ``<storage>/.serving/<pid>``.
+
+        Called with ``_lease_lock`` held.
+        """
+        directory = self._lease_directory()
+        if directory is None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, str(os.getpid()))
+        with open(path + ".tmp", "w") as f:
+            json.dump(sorted(self._leased), f)
+        os.replace(path + ".tmp", path)
+
+    def _release_lease(self):
+        directory = self._lease_directory()
+        if directory is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(directory, str(os.getpid())))
+
+    def _leased_by_others(self) -> Set[str]:
+        """Collections leased by other live processes; leases of dead ones are removed"""
+        directory = self._lease_directory()
+        if directory is None or not os.path.isdir(directory):
+            return set()
+        leased = set()
+        for name in os.listdir(directory):
+            if not name.isdigit() or int(name) == os.getpid():
+                continue
+            path = os.path.join(directory, name)
+            try:
+                os.kill(int(name), 0)
+            except ProcessLookupError:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                continue
+            except PermissionError:
+                pass  # Alive, owned by another user
+            try:
+                with open(path) as f:
+                    leased.update(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return leased
+
+    def activate(self, index: SearchIndex):
+        """Swap a built index in with one assignment; searches already running keep the old one"""
+        if self.index is not None and self.index.version != index.version:
+            self._previous_collection = self._collection_for(self.index.version)
+        self.index = index
+        with self._lease_lock:
+            # Other builds (still running, or not activated yet) stay leased
+            self._building.discard(self._collection_for(index.version))
+            self._leased = {self._collection_for(index.version)} | self._building
+            if self._previous_collection:
+                self._leased.add(self._previous_collection)
+            self._write_lease()
+
+    def prune(self):
+        """Drop stored collections that no process is serving or building.
 
-        # Persist the vector store
-        self.vectorstore.persist()
+        Besides this process's current and previous version and its builds,
+        every collection leased by another live worker sharing the storage is
+        kept. The single unversioned store used before collections were per
+        version is removed once, after a versioned index is active and leased.
+        """
+        index = self.index
+        if index is None:
+            return
+        with self._lease_lock:
+            keep = set(self._leased)
+        active = self._collection_for(index.version) in keep
+        keep |= self._leased_by_others()
+        prefix = self._collection_for("")
+        legacy = self.collection_name or LEGACY_CHROMA_COLLECTION
+        remove_legacy = active and not self._legacy_removed and legacy not in keep
+        for name in index.vectorstore.sibling_collections():
+            if (name == legacy and remove_legacy) or (
+                name.startswith(prefix) and name not in keep
+            ):
+                try:
+                    index.vectorstore.drop_collection(name)
+                    logger.info(f"Dropped stale vector collection {name}")
+                except Exception as e:
+                    logger.warning(f"Failed to drop vector collection {name}: {e}")
+        if not remove_legacy:
+            return
+        # Likewise the unversioned numpy snapshot, kept at the root
+        if self.backend == "numpy" and VECTOR_SNAPSHOT_DIR and not self.collection_name:
+            for file_name in ("embeddings.npy", "documents.json"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(VECTOR_SNAPSHOT_DIR, file_name))
+        self._legacy_removed = True
 
-    def search_relevant_context(self, query: str, k: int = 3) -> List[str]:
-        """Search for relevant context based on the query"""
-        if self.vectorstore is None:
+    def initialize_vectorstore(
+        self, pricing_data: Dict[str, Any] = None, version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the search index for pricing data (default pricing if None) and swap it in"""
+        if pricing_data is None:
+            pricing_data = DEFAULT_PRICING_DATA
+        index, report = self.build_index(pricing_data, version)
+        self.activate(index)
+        self.prune()
+        return report
+
+    def warm_up(self):
+        """Load the embedding model and build the vector store before serving"""
+        warm_up_embeddings = getattr(self.embeddings, "warm_up", None)
+        if warm_up_embeddings is not None:
+            warm_up_embeddings()
+        self.initialize_vectorstore()
+
+    def _require_index(self) -> SearchIndex:
+        # Read once per search, so a concurrent swap can't mix two versions
+        index = self.index
+        if index is None:
             raise ValueError(
                 "Vector store not initialized. Call initialize_vectorstore() first."
             )
+        return index
 
-        # Search for relevant documents
-        docs = self.vectorstore.similarity_search(query, k=k)
+    def _keyword_search(
+        self, index: SearchIndex, query: str, k: int, section: Optional[str]
+    ):
+        """BM25 hits and whether they are decisive enough to skip the embedding"""
+        if self.retrieval_mode != "hybrid":
+            return [], False
+        with stage("keyword_search"):
+            return index.keyword_index.search(query, k=k, section=section)
 
-        # Extract the content from the documents
-        context = [doc.page_content for doc in docs]
+    def _select(
+        self,
+        keyword_hits: List[Tuple[Document, float]],
+        vector_hits: List[Tuple[Document, float]],
+        k: int,
+        path: str,
+    ) -> List[str]:
+        """Fuse keyword and vector scores and keep the chunks close to the best"""
+        if RETRIEVAL_MIN_SIMILARITY is not None:
+            floor = float(RETRIEVAL_MIN_SIMILARITY)
+            vector_hits = [(doc, score) for doc, score in vector_hits if score >= floor]
+        if self.retrieval_mode != "hybrid":
+            context = [doc.page_content for doc, _ in vector_hits[:k]]
+            record_retrieval(path, len(context))
+            return context
+
+        # Both score lists are scaled by their top score before weighting, so a
+        # hit keeps its distance from the best one (min-max scaling would
+        # always zero, and so drop, the last vector hit)
+        fused: Dict[str, List[Any]] = {}
+        if keyword_hits:
+            top = keyword_hits[0][1]
+            for doc, score in keyword_hits:
+                fused[self.document_id(doc)] = [
+                    doc,
+                    HYBRID_KEYWORD_WEIGHT * score / top,
+                ]
+        if vector_hits:
+            high = max(score for _, score in vector_hits)
+            for doc, score in vector_hits:
+                normalized = max(score, 0.0) / high if high > 0 else 0.0
+                entry = fused.setdefault(self.document_id(doc), [doc, 0.0])
+                entry[1] += (1 - HYBRID_KEYWORD_WEIGHT) * normalized
+
+        ranked = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)
+        best = ranked[0][1] if ranked else 0.0
+        context = [
+            doc.page_content
+            for doc, score in ranked[:k]
+            if score >= best * RETRIEVAL_RELATIVE_CUTOFF
+        ]
+        record_retrieval(path, len(context))
         return context
 
-    def update_pricing_data(self, new_pricing_data: Dict[str, Any]):
-        """Update the vector store with new pricing data"""
-        self.initialize_vectorstore(new_pricing_data)
+    def search_relevant_context(
+        self, query: str, k: int = RETRIEVAL_MAX_K, section: Optional[str] = None
+    ) -> List[str]:
+        """Search for relevant context based on the query.
+
+        In hybrid mode at most ``k`` chunks are returned, fewer when the
+        scores fall off, and a decisive keyword match skips the embedding.
+        """
+        index = self._require_index()
+
+        keyword_hits, decisive = self._keyword_search(index, query, k, section)
+        if decisive:
+            return self._select(keyword_hits, [], k, "keyword")
+
+        # Search for relevant documents
+        embedding = self.embeddings.embed_query(query)
+        vector_hits = index.vectorstore.search_by_vector_with_scores(
+            embedding, k=k, section=section
+        )
+        return self._select(keyword_hits, vector_hits, k, self.retrieval_mode)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query under the embedding deadline, retry and circuit policy"""
+        with stage("query_embedding"):
+            return await self.embedding_guard.call(
+                lambda: self.embeddings.aembed_query(query)
+            )
+
+    async def asearch_relevant_context(
+        self,
+        query: str,
+        k: int = RETRIEVAL_MAX_K,
+        section: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> List[str]:
+        """Search for relevant context without blocking the event loop.
+
+        A precomputed query ``embedding`` may be passed to skip the embedding call.
+        If embedding fails, keyword hits (when there are any) are used alone.
+        """
+        index = self._require_index()
+
+        keyword_hits, decisive = self._keyword_search(index, query, k, section)
+        if decisive:
+            return self._select(keyword_hits, [], k, "keyword")
+
+        async with self._retrieval_semaphore:
+            if embedding is None:
+                try:
+                    embedding = await self.aembed_query(query)
+                except Exception as e:
+                    # Keyword hits are still a usable answer without the embedder
+                    if not keyword_hits:
+                        raise
+                    logger.warning(f"Query embedding failed, using keyword hits: {e}")
+                    return self._select(keyword_hits, [], k, "keyword_fallback")
+            loop = asyncio.get_running_loop()
+            with stage("vector_search"):
+                vector_hits = await loop.run_in_executor(
+                    self._search_executor,
+                    partial(
+                        index.vectorstore.search_by_vector_with_scores,
+                        embedding,
+                        k=k,
+                        section=section,
+                    ),
+                )
+
+        return self._select(keyword_hits, vector_hits, k, self.retrieval_mode)
+
+    def close(self):
+        """Release the vector search worker threads and this process's lease"""
+        self._search_executor.shutdown(wait=False)
+        self._release_lease()
+
+    def update_pricing_data(
+        self, new_pricing_data: Dict[str, Any], version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Rebuild the search index from new pricing data and swap it in"""
+        return self.initialize_vectorstore(new_pricing_data, version)
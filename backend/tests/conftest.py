@@ -0,0 +1,106 @@
+import asyncio
+import inspect
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Keep imported modules offline: no OpenAI client, no network embeddings
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDING_BACKEND", "local")
+# In memory, so tests write no vector store into the working directory
+os.environ.setdefault("VECTOR_BACKEND", "numpy")
+
+from backend.src.models.models import Base  # noqa: E402
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run ``async def`` tests on a fresh event loop"""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    names = pyfuncitem._fixtureinfo.argnames
+    asyncio.run(pyfuncitem.obj(**{name: pyfuncitem.funcargs[name] for name in names}))
+    return True
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Async engine on a fresh SQLite file with every table created.
+
+    Without pooling no connection outlives the event loop that opened it, so
+    the engine can be set up here and used from the test's own loop.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool
+    )
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def agent():
+    """AIAgent on the default pricing, with the fake chat model"""
+    from backend.src.utils.ai_agent import AIAgent
+
+    agent = AIAgent()
+    agent.warm_up()
+    yield agent
+    agent.close()
+
+
+@pytest.fixture
+def api(session_factory, agent, monkeypatch):
+    """Factory of HTTP clients for the chat API over the test database.
+
+    Use as ``async with api() as client``; the history writer runs for the
+    duration of the block and is flushed at its end.
+    """
+    from backend.src.apis import chat
+    from backend.src.db.agent_cache import AgentCache
+    from backend.src.db.database import get_db, get_read_db
+    from backend.src.db.history_writer import HistoryWriter
+
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.state.ai_agent = agent
+    app.state.agent_cache = AgentCache()
+    app.state.rate_limiter = None
+
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_session
+    app.dependency_overrides[get_read_db] = get_session
+    monkeypatch.setattr(chat, "ReadOnlySessionLocal", session_factory)
+
+    @asynccontextmanager
+    async def client():
+        app.state.history_writer = HistoryWriter(session_factory, flush_interval=0.01)
+        app.state.history_writer.start()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as http:
+                yield http
+        finally:
+            await app.state.history_writer.stop()
+
+    return client
@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.src.apis import dependencies
+from backend.src.utils.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    ClientRateLimiter,
+)
+
+
+async def test_admits_up_to_limit_then_hands_slot_to_waiter():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+    order = []
+    release = asyncio.Event()
+
+    async def holder():
+        async with controller.slot():
+            order.append("holder")
+            await release.wait()
+
+    async def waiter():
+        async with controller.slot():
+            order.append("waiter")
+
+    first = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert order == ["holder", "waiter"]
+    assert controller.in_flight == 0
+    assert controller.counts == {"admitted": 1, "admitted_after_wait": 1}
+
+
+async def test_rejects_when_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+    async with controller.slot():
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot():
+                pass
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after_header == "1"
+    assert controller.in_flight == 0
+
+
+async def test_rejects_after_queue_timeout():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.01)
+    async with controller.slot():
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot():
+                pass
+    assert excinfo.value.reason == "queue_timeout"
+    assert controller.stats()["queue_depth"] == 0
+    assert controller.in_flight == 0
+
+
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1)
+    release = asyncio.Event()
+
+    async def holder():
+        async with controller.slot():
+            await release.wait()
+
+    async def waiter():
+        async with controller.slot():
+            pass
+
+    first = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(waiter())
+    second = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(first, second)
+    assert controller.in_flight == 0
+    assert controller.stats()["queue_depth"] == 0
+
+
+def test_rate_limiter_allows_burst_then_refills():
+    limiter = ClientRateLimiter(rate_per_minute=60, burst=2)
+    limiter.check("a", now=0)
+    limiter.check("a", now=0)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        limiter.check("a", now=0)
+    assert excinfo.value.reason == "rate_limited"
+    assert excinfo.value.retry_after == pytest.approx(1)
+
+    # Other clients have their own bucket, and one token refills per second
+    limiter.check("b", now=0)
+    limiter.check("a", now=1)
+    assert limiter.stats()["limited"] == 1
+
+
+def test_rate_limiter_evicts_least_recent_client():
+    limiter = ClientRateLimiter(rate_per_minute=60, burst=1, max_clients=1)
+    limiter.check("a", now=0)
+    limiter.check("b", now=0)
+    assert limiter.stats()["tracked_clients"] == 1
+    # "a" was evicted, so it starts again with a full bucket
+    limiter.check("a", now=0)
+
+
+def make_request(host, client_id=None):
+    headers = {"x-client-id": client_id} if client_id else {}
+    return SimpleNamespace(client=SimpleNamespace(host=host), headers=headers)
+
+
+def test_client_id_header_only_trusted_from_proxy(monkeypatch):
+    monkeypatch.setattr(dependencies, "RATE_LIMIT_TRUSTED_PROXIES", {"10.0.0.1"})
+    assert dependencies.get_client_id(make_request("10.0.0.1", "tenant-7")) == (
+        "tenant-7"
+    )
+    assert dependencies.get_client_id(make_request("10.0.0.1")) == "10.0.0.1"
+    assert dependencies.get_client_id(make_request("203.0.113.5", "spoofed")) == (
+        "203.0.113.5"
+    )
@@ -0,0 +1,49 @@
+from sqlalchemy import select
+
+from backend.src.db.agent_cache import AgentCache
+from backend.src.models.models import Agent
+
+
+async def agents(session_factory):
+    async with session_factory() as session:
+        rows = await session.execute(select(Agent.id, Agent.name).order_by(Agent.id))
+        return [tuple(row) for row in rows]
+
+
+async def test_creates_each_unknown_agent_with_its_own_id(session_factory):
+    cache = AgentCache()
+    async with session_factory() as session:
+        await cache.ensure(session, 1)
+        await cache.ensure(session, 2)
+    assert await agents(session_factory) == [
+        (1, "BikeHero Assistant"),
+        (2, "BikeHero Assistant #2"),
+    ]
+    assert cache.known_ids == {1, 2}
+
+
+async def test_existing_agents_are_left_alone(session_factory):
+    async with session_factory() as session:
+        session.add(Agent(id=7, name="Workshop desk"))
+        await session.commit()
+        # Another worker's cache doesn't know the IDs yet
+        for cache in (AgentCache(), AgentCache()):
+            await cache.ensure(session, 7)
+            await cache.ensure(session, 2)
+    assert await agents(session_factory) == [
+        (2, "BikeHero Assistant #2"),
+        (7, "Workshop desk"),
+    ]
+
+
+async def test_chat_with_new_agent_ids(api):
+    async with api() as client:
+        for agent_id in (1, 2, 3):
+            response = await client.post(
+                "/chat/",
+                json={
+                    "message": "Which package suits a commuter?",
+                    "agent_id": agent_id,
+                },
+            )
+            assert response.status_code == 200
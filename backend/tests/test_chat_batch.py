@@ -0,0 +1,123 @@
+from sqlalchemy import select
+
+from backend.src.apis import chat
+from backend.src.models.models import ChatHistory
+from backend.src.utils.admission import AdmissionRejected
+
+
+async def stored_messages(session_factory):
+    async with session_factory() as session:
+        query = select(ChatHistory.message).order_by(ChatHistory.id)
+        return set((await session.execute(query)).scalars())
+
+
+async def post_batch(api, messages):
+    async with api() as client:
+        return await client.post(
+            "/chat/batch", json={"messages": [{"message": m} for m in messages]}
+        )
+
+
+async def test_batch_over_the_limit_is_rejected(api, session_factory, monkeypatch):
+    monkeypatch.setattr(chat, "BATCH_MAX_ITEMS", 2)
+    response = await post_batch(
+        api, ["Essential price?", "Premium price?", "Advanced price?"]
+    )
+    assert response.status_code == 422
+    assert "At most 2 messages" in response.json()["detail"]
+    assert await stored_messages(session_factory) == set()
+
+
+async def test_items_come_back_in_order_with_their_own_status(
+    api, agent, session_factory, monkeypatch
+):
+    process_message = agent.process_message
+
+    async def flaky(message, chat_history=None):
+        if message == "shed me":
+            raise AdmissionRejected("queue_full", 1)
+        if message == "break me":
+            raise RuntimeError("model exploded")
+        if message == "fall back":
+            return {
+                "response": "Let me transfer you to a human agent.",
+                "metadata_info": {"requires_human": True, "error": "search failed"},
+            }
+        return await process_message(message, chat_history=chat_history)
+
+    monkeypatch.setattr(agent, "process_message", flaky)
+    response = await post_batch(
+        api,
+        [
+            "Essential price?",
+            "shed me",
+            "break me",
+            "fall back",
+            "Which package suits a daily commuter?",
+        ],
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    items = body["items"]
+    assert [item["index"] for item in items] == [0, 1, 2, 3, 4]
+    assert [item["status"] for item in items] == [
+        "ok",
+        "rejected",
+        "error",
+        "error",
+        "ok",
+    ]
+    assert [item["error"] for item in items] == [
+        None,
+        "queue_full",
+        "model exploded",
+        "search failed",
+        None,
+    ]
+    assert "SGD 59" in items[0]["response"]["response"]
+    assert items[1]["response"] is None
+    # A fallback reply is still returned, and recorded
+    assert items[3]["response"]["metadata_info"]["requires_human"]
+    assert body["succeeded"] == 2
+    assert body["failed"] == 3
+    assert await stored_messages(session_factory) == {
+        "Essential price?",
+        "fall back",
+        "Which package suits a daily commuter?",
+    }
+
+
+async def test_messages_of_a_conversation_see_earlier_replies(api, agent, monkeypatch):
+    histories = []
+    process_message = agent.process_message
+
+    async def recording(message, chat_history=None):
+        histories.append((message, list(chat_history or [])))
+        return await process_message(message, chat_history=chat_history)
+
+    monkeypatch.setattr(agent, "process_message", recording)
+    async with api() as client:
+        response = await client.post(
+            "/chat/batch",
+            json={
+                "messages": [
+                    {
+                        "message": "Which package suits a commuter?",
+                        "conversation_id": "c1",
+                    },
+                    {"message": "And for racing?", "conversation_id": "c1"},
+                ]
+            },
+        )
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["response"]["conversation_id"] for item in items] == ["c1", "c1"]
+    assert histories[0] == ("Which package suits a commuter?", [])
+    message, history = histories[1]
+    assert message == "And for racing?"
+    assert history == [
+        {"role": "user", "content": "Which package suits a commuter?"},
+        {"role": "assistant", "content": items[0]["response"]["response"]},
+    ]
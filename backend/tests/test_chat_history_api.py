@@ -0,0 +1,116 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.src.apis import chat
+from backend.src.models.models import ChatHistory
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def add_rows(session_factory):
+    async def add(count, **values):
+        """Insert rows one minute apart (a shared created_at when given)"""
+        async with session_factory() as session:
+            for i in range(count):
+                session.add(
+                    ChatHistory(
+                        **{
+                            "agent_id": 1,
+                            "message": f"question {i}",
+                            "response": f"answer {i}",
+                            "created_at": START + timedelta(minutes=i),
+                            "metadata_info": {"requires_human": False},
+                            "requires_human": False,
+                            **values,
+                        }
+                    )
+                )
+            await session.commit()
+
+    return add
+
+
+async def fetch_all_pages(client, limit, **params):
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/chat/history/", params=query)
+        assert response.status_code == 200
+        body = response.json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+async def test_cursor_pages_newest_first_without_gaps(api, add_rows):
+    await add_rows(5)
+    async with api() as client:
+        pages = await fetch_all_pages(client, limit=2)
+    assert pages == [[5, 4], [3, 2], [1]]
+
+
+async def test_rows_with_equal_timestamps_are_ordered_by_id(api, add_rows):
+    await add_rows(3, created_at=START)
+    async with api() as client:
+        pages = await fetch_all_pages(client, limit=1)
+    assert pages == [[3], [2], [1]]
+
+
+async def test_filters(api, add_rows):
+    await add_rows(2)
+    await add_rows(2, requires_human=True, agent_id=2, created_at=START)
+    async with api() as client:
+        human = await fetch_all_pages(client, limit=10, requires_human="true")
+        bot = await fetch_all_pages(client, limit=10, requires_human="false")
+        by_agent = await fetch_all_pages(client, limit=10, agent_id=2)
+        since = await fetch_all_pages(
+            client, limit=10, since=(START + timedelta(minutes=1)).isoformat()
+        )
+    assert human == [[4, 3]]
+    assert bot == [[2, 1]]
+    assert by_agent == [[4, 3]]
+    assert since == [[2]]
+
+
+async def test_invalid_cursor_is_rejected(api):
+    async with api() as client:
+        response = await client.get("/chat/history/", params={"cursor": "nope"})
+    assert response.status_code == 400
+
+
+async def test_export_streams_every_matching_row(api, add_rows, monkeypatch):
+    monkeypatch.setattr(chat, "EXPORT_BATCH_SIZE", 2)
+    await add_rows(5)
+    await add_rows(1, requires_human=True)
+    async with api() as client:
+        everything = await client.get("/chat/history/export")
+        human = await client.get(
+            "/chat/history/export", params={"requires_human": "true"}
+        )
+
+    assert everything.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in everything.text.splitlines()]
+    assert [record["id"] for record in records] == [5, 4, 3, 2, 6, 1]
+    assert records[0]["message"] == "question 4"
+    assert records[0]["response"] == "answer 4"
+    assert [json.loads(line)["id"] for line in human.text.splitlines()] == [6]
+
+
+async def test_chat_turns_show_up_in_history(api):
+    async with api() as client:
+        reply = await client.post(
+            "/chat/", json={"message": "Which package suits a daily commuter?"}
+        )
+    assert reply.status_code == 200
+    async with api() as client:
+        history = await client.get("/chat/history/")
+    items = history.json()["items"]
+    assert [item["message"] for item in items] == [
+        "Which package suits a daily commuter?"
+    ]
+    assert items[0]["conversation_id"] == reply.json()["conversation_id"]
+    assert items[0]["requires_human"] is False
@@ -0,0 +1,153 @@
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+
+from backend.src.db import history_archiver
+from backend.src.db.history_archiver import HistoryArchiver, read_archive
+from backend.src.models.models import ChatHistory
+
+# With 30 days' retention, rows created before 2025-01-30 are archived
+NOW = datetime(2025, 3, 1)
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "archive")
+
+
+@pytest.fixture
+def archiver(session_factory, engine, archive_dir):
+    return HistoryArchiver(session_factory, engine, archive_dir, retention_days=30)
+
+
+async def add(session_factory, *created_at):
+    async with session_factory() as session:
+        for when in created_at:
+            session.add(
+                ChatHistory(
+                    agent_id=1,
+                    conversation_id="c1",
+                    message=f"asked {when:%m-%d %H:%M}",
+                    response="Essential is SGD 59",
+                    created_at=when,
+                    metadata_info={"requires_human": False},
+                    requires_human=False,
+                )
+            )
+        await session.commit()
+
+
+async def remaining(session_factory):
+    async with session_factory() as session:
+        query = select(ChatHistory.message).order_by(ChatHistory.id)
+        return list((await session.execute(query)).scalars())
+
+
+def parts(archive_dir, day):
+    """Part files of a day, as their id ranges"""
+    names = sorted(os.listdir(os.path.join(archive_dir, f"day={day}")))
+    assert all(
+        name.startswith("part-") and name.endswith(".jsonl.gz") for name in names
+    )
+    return [name.split("-")[1:3] for name in names]
+
+
+async def test_old_rows_move_to_their_day_file(archiver, archive_dir, session_factory):
+    await add(
+        session_factory,
+        datetime(2025, 1, 10, 9, 0),
+        datetime(2025, 1, 11, 18, 30),
+        datetime(2025, 1, 10, 17, 45),
+        datetime(2025, 2, 20, 12, 0),
+    )
+
+    report = await archiver.archive_once(now=NOW)
+
+    assert (report["rows"], report["files"]) == (3, 2)
+    assert await remaining(session_factory) == ["asked 02-20 12:00"]
+    assert parts(archive_dir, "2025-01-10") == [["000000000001", "000000000003"]]
+    assert parts(archive_dir, "2025-01-11") == [["000000000002", "000000000002"]]
+    records = list(read_archive(archive_dir, since=date(2025, 1, 10)))
+    assert [(r["id"], r["created_at"]) for r in records] == [
+        (1, "2025-01-10T09:00:00"),
+        (3, "2025-01-10T17:45:00"),
+        (2, "2025-01-11T18:30:00"),
+    ]
+    assert records[0]["conversation_id"] == "c1"
+    assert records[0]["metadata_info"] == {"requires_human": False}
+    assert list(read_archive(archive_dir, until=date(2025, 1, 10))) == records[:2]
+
+
+async def test_second_run_adds_a_part_without_touching_the_first(
+    archiver, archive_dir, session_factory
+):
+    await add(session_factory, datetime(2025, 1, 10, 9, 0))
+    await archiver.archive_once(now=NOW)
+
+    # A late write for the same day, archived by the next run. The table is
+    # empty by then, so SQLite hands out id 1 again
+    await add(session_factory, datetime(2025, 1, 10, 23, 59))
+    report = await archiver.archive_once(now=NOW)
+
+    assert report["rows"] == 1
+    assert parts(archive_dir, "2025-01-10") == [["000000000001"] * 2] * 2
+    records = read_archive(archive_dir)
+    assert sorted((r["id"], r["message"]) for r in records) == [
+        (1, "asked 01-10 09:00"),
+        (1, "asked 01-10 23:59"),
+    ]
+    assert await remaining(session_factory) == []
+    assert archiver.stats()["rows_archived"] == 2
+
+
+async def test_rows_are_kept_when_their_file_cannot_be_written(
+    archiver, archive_dir, session_factory, monkeypatch
+):
+    await add(session_factory, datetime(2025, 1, 10, 9, 0), datetime(2025, 1, 11, 9, 0))
+    write_part = history_archiver.write_part
+
+    def fail_second_day(directory, day, records):
+        if day == date(2025, 1, 11):
+            raise OSError("disk full")
+        return write_part(directory, day, records)
+
+    monkeypatch.setattr(history_archiver, "write_part", fail_second_day)
+    with pytest.raises(OSError):
+        await archiver.archive_once(now=NOW)
+    # Nothing of the batch is deleted, not even the day that was written
+    assert await remaining(session_factory) == [
+        "asked 01-10 09:00",
+        "asked 01-11 09:00",
+    ]
+
+    # The next run re-writes the first day's part under the same name
+    monkeypatch.setattr(history_archiver, "write_part", write_part)
+    await archiver.archive_once(now=NOW)
+    assert parts(archive_dir, "2025-01-10") == [["000000000001"] * 2]
+    assert [r["id"] for r in read_archive(archive_dir)] == [1, 2]
+    assert await remaining(session_factory) == []
+
+
+async def test_nothing_to_archive(archiver, archive_dir, session_factory):
+    await add(session_factory, datetime(2025, 2, 20, 12, 0))
+    report = await archiver.archive_once(now=NOW)
+    assert report["rows"] == 0
+    assert "vacuum" not in report
+    assert await remaining(session_factory) == ["asked 02-20 12:00"]
+    assert list(read_archive(archive_dir)) == []
+
+
+async def test_batches_and_vacuum(archiver, session_factory):
+    await archiver.enable_incremental_vacuum()
+    await add(
+        session_factory, *(datetime(2025, 1, 10, 9, minute) for minute in range(5))
+    )
+    archiver.batch_size = 2
+
+    report = await archiver.archive_once(now=NOW)
+
+    assert report["rows"] == 5
+    assert report["vacuum"]["pages_freed"] >= 0
+    assert await remaining(session_factory) == []
@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from backend.src.db.history_writer import HistoryWriter
+from backend.src.models.models import ChatHistory
+
+
+def row(conversation_id, message):
+    return {
+        "conversation_id": conversation_id,
+        "message": message,
+        "response": f"re: {message}",
+        "metadata_info": {"requires_human": False},
+    }
+
+
+async def stored_messages(session_factory, conversation_id=None):
+    query = select(ChatHistory.message).order_by(ChatHistory.id)
+    if conversation_id:
+        query = query.where(ChatHistory.conversation_id == conversation_id)
+    async with session_factory() as session:
+        return list((await session.execute(query)).scalars())
+
+
+def locked_for(session_factory, failures):
+    """Session factory whose first ``failures`` commits fail as if the database were locked"""
+    calls = 0
+
+    async def locked():
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    @asynccontextmanager
+    async def factory():
+        nonlocal calls
+        calls += 1
+        async with session_factory() as session:
+            if calls <= failures:
+                session.commit = locked
+            yield session
+
+    return factory
+
+
+async def test_rows_are_written_in_batches(session_factory):
+    writer = HistoryWriter(session_factory, batch_size=3, flush_interval=0.05)
+    writer.start()
+    for i in range(7):
+        await writer.enqueue(row("c1", f"m{i}"))
+    await writer.stop()
+
+    assert await stored_messages(session_factory) == [f"m{i}" for i in range(7)]
+    stats = writer.stats()
+    assert stats["rows_written"] == 7
+    assert stats["batches_written"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["rows_failed"] == 0
+
+
+async def test_flush_interval_writes_partial_batch(session_factory):
+    writer = HistoryWriter(session_factory, batch_size=100, flush_interval=0.01)
+    writer.start()
+    await writer.enqueue(row("c1", "hello"))
+    for _ in range(100):
+        if writer.rows_written:
+            break
+        await asyncio.sleep(0.01)
+    stored = await stored_messages(session_factory)
+    await writer.stop()
+    assert stored == ["hello"]
+
+
+async def test_pending_rows_until_written(session_factory):
+    writer = HistoryWriter(session_factory)
+    # Not started yet, so rows stay queued
+    await writer.enqueue(row("c1", "first"))
+    await writer.enqueue(row("c2", "other"))
+    await writer.enqueue(row("c1", "second"))
+    pending = writer.pending_rows("c1")
+    assert [r["message"] for r in pending] == ["first", "second"]
+    assert all("created_at" in r for r in pending)
+
+    writer.start()
+    await writer.stop()
+    assert writer.pending_rows("c1") == []
+    assert await stored_messages(session_factory, "c1") == ["first", "second"]
+
+
+async def test_transient_failure_is_retried(session_factory):
+    writer = HistoryWriter(locked_for(session_factory, failures=1), retry_backoff=0.001)
+    writer.start()
+    await writer.enqueue(row("c1", "first"))
+    await writer.enqueue(row("c1", "second"))
+    await writer.stop()
+
+    assert await stored_messages(session_factory) == ["first", "second"]
+    assert writer.stats()["retries"] == 1
+    assert writer.rows_written == 2
+    assert writer.rows_failed == 0
+
+
+async def test_bad_row_is_dropped_alone(session_factory):
+    writer = HistoryWriter(session_factory, max_retries=1, retry_backoff=0.001)
+    await writer.enqueue(row("c1", "good"))
+    # Its metadata can't be encoded, so only this row fails to insert
+    await writer.enqueue({**row("c1", "bad"), "metadata_info": {"at": object()}})
+    await writer.enqueue(row("c1", "also good"))
+    writer.start()
+    await writer.stop()
+
+    assert await stored_messages(session_factory) == ["good", "also good"]
+    assert writer.rows_written == 2
+    assert writer.rows_failed == 1
+    assert writer.pending_rows("c1") == []
+
+
+async def test_persistent_failure_is_counted_and_forgotten(session_factory):
+    writer = HistoryWriter(
+        locked_for(session_factory, failures=100), max_retries=2, retry_backoff=0.001
+    )
+    writer.start()
+    await writer.enqueue(row("c1", "lost"))
+    await writer.stop()
+
+    assert writer.retries == 2
+    assert writer.rows_failed == 1
+    assert writer.rows_written == 0
+    assert writer.pending_rows("c1") == []
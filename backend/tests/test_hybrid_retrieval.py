@@ -0,0 +1,111 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.src.utils import vector_db
+from backend.src.utils.bm25 import BM25Index
+from backend.src.utils.vector_db import VectorDBManager
+
+
+def chunk(name, text, section="packages"):
+    return Document(
+        page_content=text,
+        metadata={"source": "pricing", "section": section, "chunk_id": name},
+    )
+
+
+ESSENTIAL = chunk("essential", "Essential package: tune brakes, gearing and tires")
+PREMIUM = chunk("premium", "Premium package: full wash of frame, wheels and bars")
+INNER_TUBE = chunk(
+    "inner-tube", "Inner-tube replacement (standard) SGD 29", section="addons"
+)
+TRUING = chunk("truing", "Wheel truing SGD 25 per wheel", section="addons")
+
+
+@pytest.fixture
+def keyword_index():
+    return BM25Index([ESSENTIAL, PREMIUM, INNER_TUBE, TRUING])
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = VectorDBManager(persist_directory=str(tmp_path), backend="numpy")
+    manager.initialize_vectorstore()
+    yield manager
+    manager.close()
+
+
+def test_distinct_keyword_match_is_decisive(keyword_index):
+    hits, decisive = keyword_index.search("inner-tube replacement", k=3)
+    assert decisive
+    assert hits[0][0] is INNER_TUBE
+
+
+def test_shared_words_are_not_decisive(keyword_index):
+    # Both packages match "package" about equally well
+    hits, decisive = keyword_index.search("package", k=3)
+    assert not decisive
+    assert {doc.metadata["chunk_id"] for doc, _ in hits} == {"essential", "premium"}
+
+
+def test_keyword_search_within_section(keyword_index):
+    hits, _ = keyword_index.search("wheel", k=3, section="addons")
+    assert [doc for doc, _ in hits] == [TRUING]
+    assert keyword_index.search("nothing matches", k=3) == ([], False)
+
+
+def test_decisive_match_skips_the_embedding(manager, monkeypatch):
+    def embed_query(query):
+        raise AssertionError(f"embedded {query!r}")
+
+    monkeypatch.setattr(manager.embeddings, "embed_query", embed_query)
+    context = manager.search_relevant_context("inner-tube replacement price")
+    assert "Tire & Tube Services" in context[0]
+
+
+async def test_decisive_match_skips_the_embedding_async(manager, monkeypatch):
+    async def aembed_query(query):
+        raise AssertionError(f"embedded {query!r}")
+
+    monkeypatch.setattr(manager, "aembed_query", aembed_query)
+    context = await manager.asearch_relevant_context("wheel truing")
+    assert "Wheel & Drivetrain" in context[0]
+
+
+def test_vague_query_is_embedded(manager, monkeypatch):
+    queries = []
+    embed_query = manager.embeddings.embed_query
+
+    def counting(query):
+        queries.append(query)
+        return embed_query(query)
+
+    monkeypatch.setattr(manager.embeddings, "embed_query", counting)
+    assert manager.search_relevant_context("how much is the premium package")
+    assert queries == ["how much is the premium package"]
+
+
+def test_fusion_ranks_chunks_found_by_both_first(manager):
+    keyword_hits = [(ESSENTIAL, 10.0), (PREMIUM, 5.0)]
+    vector_hits = [(PREMIUM, 0.9), (TRUING, 0.8)]
+    # Premium 0.25 + 0.5, Essential 0.5, Truing 0.5 * 0.8 / 0.9
+    context = manager._select(keyword_hits, vector_hits, k=3, path="hybrid")
+    assert context == [
+        PREMIUM.page_content,
+        ESSENTIAL.page_content,
+        TRUING.page_content,
+    ]
+
+
+def test_fusion_follows_keyword_weight_and_cutoff(manager, monkeypatch):
+    monkeypatch.setattr(vector_db, "HYBRID_KEYWORD_WEIGHT", 0.9)
+    keyword_hits = [(ESSENTIAL, 10.0), (PREMIUM, 5.0)]
+    vector_hits = [(PREMIUM, 0.9), (TRUING, 0.8)]
+    # Essential 0.9, Premium 0.45 + 0.1; Truing (0.09) falls below half the best
+    context = manager._select(keyword_hits, vector_hits, k=3, path="hybrid")
+    assert context == [ESSENTIAL.page_content, PREMIUM.page_content]
+
+
+def test_vector_mode_keeps_vector_order(manager, monkeypatch):
+    monkeypatch.setattr(manager, "retrieval_mode", "vector")
+    context = manager._select([], [(TRUING, 0.8), (PREMIUM, 0.7)], k=1, path="vector")
+    assert context == [TRUING.page_content]
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.src.db.migrations import upgrade_database
+
+# chat_histories as first released, before any column was added to it
+BASELINE_SCHEMA = """
+CREATE TABLE agents (
+    id INTEGER PRIMARY KEY, name VARCHAR, description TEXT,
+    created_at DATETIME, updated_at DATETIME
+);
+CREATE TABLE chat_histories (
+    id INTEGER PRIMARY KEY, agent_id INTEGER REFERENCES agents(id),
+    message TEXT, response TEXT, created_at DATETIME, metadata_info JSON
+);
+"""
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    return create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'old.db'}", poolclass=NullPool
+    )
+
+
+async def create_baseline(engine, rows):
+    async with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA.split(";"):
+            if statement.strip():
+                await conn.execute(text(statement))
+        for requires_human in rows:
+            await conn.execute(
+                text(
+                    "INSERT INTO chat_histories (agent_id, message, response, "
+                    "created_at, metadata_info) VALUES "
+                    "(1, 'q', 'a', '2025-01-01 09:00:00', :metadata)"
+                ),
+                {"metadata": json.dumps({"requires_human": requires_human})},
+            )
+
+
+async def describe(engine):
+    def read(conn):
+        inspector = inspect(conn)
+        return (
+            {column["name"] for column in inspector.get_columns("chat_histories")},
+            {index["name"] for index in inspector.get_indexes("chat_histories")},
+        )
+
+    async with engine.connect() as conn:
+        return await conn.run_sync(read)
+
+
+async def test_adds_and_backfills_requires_human(old_engine):
+    await create_baseline(old_engine, rows=[True, False])
+
+    applied = await upgrade_database(old_engine)
+
+    assert "add column chat_histories.requires_human" in applied
+    columns, indexes = await describe(old_engine)
+    assert "requires_human" in columns
+    assert "ix_chat_histories_requires_human_created_at_id" in indexes
+    async with old_engine.connect() as conn:
+        flags = (
+            await conn.execute(
+                text("SELECT requires_human FROM chat_histories ORDER BY id")
+            )
+        ).scalars()
+        assert list(flags) == [1, 0]
+    await old_engine.dispose()
+
+
+async def test_adds_conversation_id_with_its_index(old_engine):
+    await create_baseline(old_engine, rows=[False])
+
+    applied = await upgrade_database(old_engine)
+
+    assert "add column chat_histories.conversation_id" in applied
+    assert "create index ix_chat_histories_conversation_id_created_at_id" in applied
+    columns, indexes = await describe(old_engine)
+    assert "conversation_id" in columns
+    assert "ix_chat_histories_conversation_id_created_at_id" in indexes
+    async with old_engine.connect() as conn:
+        ids = await conn.execute(text("SELECT conversation_id FROM chat_histories"))
+        assert list(ids.scalars()) == [None]
+    await old_engine.dispose()
+
+
+async def test_upgrade_is_idempotent(old_engine):
+    await create_baseline(old_engine, rows=[])
+    assert await upgrade_database(old_engine)
+    assert await upgrade_database(old_engine) == []
+    await old_engine.dispose()
+
+
+async def test_current_schema_and_missing_table_need_nothing(engine, old_engine):
+    assert await upgrade_database(engine) == []
+    # Nothing created yet: create_all makes the table with every column
+    assert await upgrade_database(old_engine) == []
+    await old_engine.dispose()
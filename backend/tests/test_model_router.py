@@ -0,0 +1,64 @@
+import pytest
+
+from backend.src.utils.model_router import ModelRouter
+from backend.src.utils.price_index import PriceIndex
+from backend.src.utils.pricing import DEFAULT_PRICING_DATA
+
+
+@pytest.fixture(scope="module")
+def router():
+    return ModelRouter(PriceIndex(DEFAULT_PRICING_DATA))
+
+
+@pytest.mark.parametrize(
+    "message, route",
+    [
+        ("Hi", ("template", "greeting")),
+        ("Good morning!", ("template", "greeting")),
+        ("Thank you very much", ("template", "thanks")),
+        # Off-topic: neither a service nor a price word
+        ("What's the weather like tomorrow?", ("fast", "off_topic")),
+        ("Tell me a joke", ("fast", "off_topic")),
+        # One service, one question
+        ("Do you fix punctures on e-bikes?", ("fast", "simple")),
+        ("How long does a bike service take?", ("fast", "simple")),
+        # Comparisons, several questions or several services
+        (
+            "What's the difference between Essential and Premium?",
+            ("main", "multi_part"),
+        ),
+        (
+            "Does Advanced include a wash? How long does it take?",
+            ("main", "multi_part"),
+        ),
+        (
+            "I need a chain replacement, wheel truing and a kickstand for my bike",
+            ("main", "multi_part"),
+        ),
+        ("Can you tune my bike " + "please " * 40, ("main", "multi_part")),
+    ],
+)
+def test_classify(router, message, route):
+    assert router.classify(message) == route
+
+
+@pytest.mark.parametrize("message", ["Hi", "Thanks"])
+def test_short_replies_mid_conversation_go_to_a_model(router, message):
+    tier, _ = router.classify(message, has_history=True)
+    assert tier == "fast"
+
+
+def test_greeting_inside_a_question_is_not_a_template(router):
+    assert router.classify("Hi, how much is a bike service?") == ("fast", "simple")
+
+
+async def test_agent_answers_by_tier(agent):
+    greeting = await agent.process_message("Hello")
+    off_topic = await agent.process_message("Who won the football last night?")
+    multi_part = await agent.process_message(
+        "Which package should I pick for commuting, and does it include brakes?"
+    )
+
+    assert greeting["metadata_info"]["model_tier"] == "template"
+    assert off_topic["metadata_info"]["model_tier"] == "fast"
+    assert multi_part["metadata_info"]["model_tier"] == "main"
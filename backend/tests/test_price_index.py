@@ -0,0 +1,60 @@
+import pytest
+
+from backend.src.utils.price_index import PriceIndex
+from backend.src.utils.pricing import DEFAULT_PRICING_DATA
+
+
+@pytest.fixture(scope="module")
+def price_index():
+    return PriceIndex(DEFAULT_PRICING_DATA)
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("How much is the Essential package?", ["SGD 59", "SGD 94"]),
+        ("Essential annual price?", ["annual plan", "SGD 94"]),
+        ("What's the price of the Advanced plan per year?", ["SGD 142"]),
+        ("What is the price of the Premium package one-time?", ["SGD 129"]),
+        ("How much does the Essential package cost for my bike?", ["SGD 59"]),
+        ("How much does a kickstand cost?", ["Kickstand", "SGD 35"]),
+        ("Price of brake lever?", ["Brake lever", "from SGD 35"]),
+        ("chain replacement 11-spd price?", ["11-spd", "SGD 70"]),
+    ],
+)
+def test_direct_price_questions_are_answered(price_index, message, expected):
+    answer = price_index.match(message)
+    assert answer is not None
+    for text in expected:
+        assert text in answer
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # Negation or exclusion
+        "What's the cost of Essential if I don't want it annual?",
+        "Premium price not including wash?",
+        # Time
+        "Price of essential last year?",
+        # Quantity
+        "How much is the Essential package for 3 bikes?",
+        # Currency
+        "Essential price in USD?",
+        # A more specific problem than the service name
+        "How much to fix a flat tire?",
+        "Dutch bike tire price?",
+        # Another vehicle: off topic
+        "Price to fix my brake lever on my car?",
+        # Comparisons, several entities or several questions
+        "Which is cheaper, Essential or Advanced?",
+        "Essential price? Premium price?",
+        "How much are pedals and grips?",
+        # Ambiguous add-on
+        "How much is an inner-tube?",
+        # No price intent
+        "Tell me about the Essential package",
+    ],
+)
+def test_other_questions_fall_through(price_index, message):
+    assert price_index.match(message) is None
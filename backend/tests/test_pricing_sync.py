@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.src.db.pricing_sync import PricingSync
+from backend.src.models.models import PricingVersion
+from backend.src.utils.pricing import InvalidPricingData, pricing_version
+
+
+def pricing(one_time):
+    """Bike-service pricing with the Essential one-time price set"""
+    return {
+        "packages": {
+            "Essential": {
+                "one_time": one_time,
+                "annual": 94,
+                "includes": "Tune brakes, gearing, tires, headset, saddle",
+            }
+        },
+        "addons": {"Brake Services": {"Brake bleeding": "SGD 45"}},
+        "info": {"turnaround": "~2-day turnaround"},
+    }
+
+
+class FakeAgent:
+    """Records applied versions; the index build fails while ``fail`` is set"""
+
+    def __init__(self):
+        self.applied = []
+        self.fail = False
+
+    async def aset_pricing_context(self, pricing_data, version=None, before_swap=None):
+        if self.fail:
+            raise RuntimeError("index build failed")
+        if before_swap is not None:
+            await before_swap()
+        self.applied.append(version)
+        return {"version": version}
+
+
+async def stored_versions(session_factory):
+    async with session_factory() as session:
+        return await session.scalar(select(func.count(PricingVersion.id)))
+
+
+async def test_publish_stores_and_applies_then_other_worker_syncs(session_factory):
+    publisher = PricingSync(session_factory)
+    publisher.ai_agent = FakeAgent()
+    report = await publisher.publish(pricing(59))
+
+    other = PricingSync(session_factory)
+    other.ai_agent = FakeAgent()
+    caught_up = await other.sync()
+    again = await other.sync()
+
+    version = pricing_version(pricing(59))
+    assert report == {
+        "version_id": 1,
+        "pricing_version": version,
+        "ingestion": {"version": version},
+    }
+    assert publisher.applied_id == 1
+    assert publisher.ai_agent.applied == [version]
+    assert caught_up and not again
+    assert other.applied_id == 1
+    assert other.ai_agent.applied == [version]
+    assert other.stats()["versions_applied"] == 1
+
+
+async def test_invalid_payload_is_rejected_and_not_stored(session_factory):
+    sync = PricingSync(session_factory)
+    sync.ai_agent = FakeAgent()
+    with pytest.raises(InvalidPricingData):
+        await sync.publish({"packages": ["not", "an", "object"]})
+    assert await stored_versions(session_factory) == 0
+    assert sync.applied_id is None
+    assert sync.ai_agent.applied == []
+
+
+async def test_failed_build_stores_nothing(session_factory):
+    sync = PricingSync(session_factory)
+    sync.ai_agent = FakeAgent()
+    sync.ai_agent.fail = True
+    with pytest.raises(RuntimeError):
+        await sync.publish(pricing(59))
+    assert await stored_versions(session_factory) == 0
+    assert sync.applied_id is None
+
+
+async def test_sync_skips_invalid_stored_version(session_factory):
+    async with session_factory() as session:
+        session.add(PricingVersion(version="good", pricing_data=pricing(59)))
+        session.add(PricingVersion(version="bad", pricing_data={"addons": [1]}))
+        await session.commit()
+
+    sync = PricingSync(session_factory)
+    sync.ai_agent = FakeAgent()
+    assert not await sync.sync()
+    assert await sync.sync()
+    assert sync.applied_id == 1
+    assert sync.ai_agent.applied == ["good"]
+    assert sync.stats()["versions_rejected"] == [2]
+
+
+async def test_older_version_is_not_applied_over_newer(session_factory):
+    sync = PricingSync(session_factory)
+    sync.ai_agent = FakeAgent()
+    await sync._apply(2, "newer", pricing(65))
+    assert await sync._apply(1, "older", pricing(59)) is None
+    assert sync.applied_id == 2
+    assert sync.ai_agent.applied == ["newer"]
+
+
+async def test_start_catches_up_and_stop_ends_polling(session_factory):
+    publisher = PricingSync(session_factory)
+    publisher.ai_agent = FakeAgent()
+    await publisher.publish(pricing(59))
+
+    worker = PricingSync(session_factory, poll_interval=0.01)
+    await worker.start(FakeAgent())
+    assert worker.applied_id == 1
+    await publisher.publish(pricing(65))
+    for _ in range(100):
+        if worker.applied_id == 2:
+            break
+        await asyncio.sleep(0.01)
+    await worker.stop()
+
+    assert worker.applied_id == 2
+    assert worker.polls >= 1
+    assert worker._task is None
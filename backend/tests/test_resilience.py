@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+
+from backend.src.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCall,
+    backoff_delay,
+    retry_sync,
+)
+
+
+class Flaky:
+    """Fails with ``error`` for the first ``failures`` calls, then returns ``result``"""
+
+    def __init__(self, failures, error=asyncio.TimeoutError, result="ok"):
+        self.failures = failures
+        self.error = error
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        return self.result
+
+    async def coroutine(self):
+        return self()
+
+
+def make_call(**kwargs):
+    kwargs.setdefault("timeout", 1)
+    kwargs.setdefault("backoff_base", 0)
+    return ResilientCall("test", **kwargs)
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.1, cap=0.5) <= 0.5
+
+
+def test_breaker_opens_after_threshold_and_probes_after_reset():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+    # Once the reset window has passed, a single probe goes through
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats() == {
+        "state": "closed",
+        "consecutive_failures": 0,
+        "times_opened": 1,
+    }
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=60)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+async def test_call_retries_retryable_errors():
+    flaky = Flaky(failures=2)
+    call = make_call(max_retries=2)
+    assert await call.call(flaky.coroutine) == "ok"
+    assert flaky.calls == 3
+    assert call.counts == {"timeout": 2, "retried": 2, "success": 1}
+    assert call.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_call_gives_up_after_max_retries():
+    flaky = Flaky(failures=5)
+    call = make_call(max_retries=1)
+    with pytest.raises(asyncio.TimeoutError):
+        await call.call(flaky.coroutine)
+    assert flaky.calls == 2
+    assert call.breaker.consecutive_failures == 1
+
+
+async def test_call_does_not_retry_other_errors():
+    flaky = Flaky(failures=1, error=ValueError)
+    call = make_call(max_retries=2)
+    with pytest.raises(ValueError):
+        await call.call(flaky.coroutine)
+    assert flaky.calls == 1
+    assert call.counts == {"error": 1}
+
+
+async def test_call_enforces_deadline():
+    async def slow():
+        await asyncio.sleep(1)
+
+    call = make_call(timeout=0.01, max_retries=0)
+    with pytest.raises(asyncio.TimeoutError, match="timed out"):
+        await call.call(slow)
+    assert call.counts == {"timeout": 1}
+
+
+async def test_open_circuit_rejects_without_calling():
+    flaky = Flaky(failures=0)
+    call = make_call(breaker=CircuitBreaker("test", failure_threshold=1))
+    call.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        await call.call(flaky.coroutine)
+    assert flaky.calls == 0
+    assert call.counts == {"rejected": 1}
+
+
+async def test_slow_attempt_is_hedged():
+    call = make_call(hedge_percentile=50, hedge_min_samples=1)
+    call.latencies.append(0.01)
+    attempts = 0
+
+    async def first_slow():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(1 if attempts == 1 else 0)
+        return attempts
+
+    assert await call.call(first_slow) == 2
+    assert call.counts["hedged"] == 1
+    assert call.counts["hedge_won"] == 1
+
+
+async def test_stream_retries_until_first_item():
+    opened = 0
+
+    async def tokens():
+        nonlocal opened
+        opened += 1
+        if opened == 1:
+            raise asyncio.TimeoutError()
+        for token in ("a", "b", "c"):
+            yield token
+
+    call = make_call(max_retries=1)
+    received = [token async for token in call.stream(tokens)]
+    assert opened == 2
+    assert received == ["a", "b", "c"]
+    assert call.counts == {"timeout": 1, "retried": 1, "success": 1}
+
+
+async def test_stalled_stream_is_cut_off_after_first_item():
+    closed = False
+
+    async def tokens():
+        nonlocal closed
+        try:
+            yield "a"
+            await asyncio.sleep(1)
+            yield "b"
+        finally:
+            closed = True
+
+    call = make_call(timeout=0.05, max_retries=2)
+    received = []
+    with pytest.raises(asyncio.TimeoutError, match="stalled"):
+        async for token in call.stream(tokens):
+            received.append(token)
+    assert received == ["a"]
+    assert closed
+    assert call.counts == {"timeout": 1}
+    assert call.breaker.consecutive_failures == 1
+
+
+async def test_idle_timeout_applies_per_item_not_to_the_whole_stream():
+    async def tokens():
+        for token in ("a", "b", "c", "d"):
+            await asyncio.sleep(0.02)
+            yield token
+
+    # Longer than the timeout in total, but no gap between items is
+    call = make_call(timeout=0.05)
+    assert [token async for token in call.stream(tokens)] == ["a", "b", "c", "d"]
+    assert call.counts == {"success": 1}
+
+
+def test_retry_sync_retries_then_succeeds():
+    flaky = Flaky(failures=2)
+    assert retry_sync("test", flaky, max_retries=2, backoff_base=0) == "ok"
+    assert flaky.calls == 3
+
+
+def test_retry_sync_raises_after_max_retries_or_on_other_errors():
+    flaky = Flaky(failures=5)
+    with pytest.raises(asyncio.TimeoutError):
+        retry_sync("test", flaky, max_retries=1, backoff_base=0)
+    assert flaky.calls == 2
+
+    flaky = Flaky(failures=1, error=ValueError)
+    with pytest.raises(ValueError):
+        retry_sync("test", flaky, max_retries=2, backoff_base=0)
+    assert flaky.calls == 1
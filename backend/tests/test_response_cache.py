@@ -0,0 +1,99 @@
+import time
+
+from backend.src.utils.response_cache import ResponseCache
+
+VERSION = "v1"
+
+
+def make_cache(**kwargs):
+    cache = ResponseCache(**kwargs)
+    cache.invalidate(VERSION)
+    return cache
+
+
+def reply(text):
+    return {"response": text, "metadata_info": {"requires_human": False}}
+
+
+def test_exact_hit_on_normalized_question():
+    cache = make_cache()
+    cache.set("How much is the Essential package?", VERSION, reply("SGD 59"))
+
+    hit = cache.get("how much is the essential package", VERSION)
+    assert hit["response"] == "SGD 59"
+    assert hit["metadata_info"]["cache_hit"] == "exact"
+    assert cache.get("How much is the Premium package?", VERSION) is None
+
+    # Hits are copies; changing one doesn't change the cached entry
+    hit["response"] = "changed"
+    assert cache.get("How much is the Essential package?", VERSION)["response"] == (
+        "SGD 59"
+    )
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_other_pricing_version_misses_and_invalidate_clears():
+    cache = make_cache()
+    cache.set("Essential price?", VERSION, reply("SGD 59"))
+    assert cache.get("Essential price?", "v2") is None
+    # Responses computed against an old version are not stored
+    cache.set("Premium price?", "v0", reply("SGD 129"))
+    assert cache.get("Premium price?", VERSION) is None
+
+    cache.invalidate("v2")
+    assert cache.get("Essential price?", "v2") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = make_cache(semantic_threshold=0.9)
+    cache.set("Essential price?", VERSION, reply("SGD 59"), embedding=[1.0, 0.0])
+
+    close = cache.get_similar([0.95, 0.3], VERSION)
+    assert close["response"] == "SGD 59"
+    assert close["metadata_info"]["cache_hit"] == "semantic"
+    assert cache.get_similar([0.5, 0.5], VERSION) is None
+    assert cache.get_similar([0.95, 0.3], "v2") is None
+
+
+def test_semantic_lookup_off_without_threshold():
+    cache = make_cache()
+    cache.set("Essential price?", VERSION, reply("SGD 59"), embedding=[1.0, 0.0])
+    assert cache.get_similar([1.0, 0.0], VERSION) is None
+
+
+def test_expired_entries_miss():
+    cache = make_cache(ttl_seconds=0.01, semantic_threshold=0.9)
+    cache.set("Essential price?", VERSION, reply("SGD 59"), embedding=[1.0, 0.0])
+    time.sleep(0.02)
+    assert cache.get("Essential price?", VERSION) is None
+    assert cache.get_similar([1.0, 0.0], VERSION) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.set("Essential price?", VERSION, reply("SGD 59"))
+    cache.set("Premium price?", VERSION, reply("SGD 129"))
+    cache.get("Essential price?", VERSION)
+    cache.set("Advanced price?", VERSION, reply("SGD 89"))
+
+    assert cache.get("Premium price?", VERSION) is None
+    assert cache.get("Essential price?", VERSION) is not None
+    assert cache.get("Advanced price?", VERSION) is not None
+
+
+async def test_agent_bypasses_cache_with_chat_history(agent):
+    question = "Which package suits someone who commutes daily?"
+    first = await agent.process_message(question)
+    second = await agent.process_message(question)
+    assert first["metadata_info"]["cache_hit"] is False
+    assert second["metadata_info"]["cache_hit"] == "exact"
+
+    history = [{"role": "user", "content": "I ride a folding bike"}]
+    with_history = await agent.process_message(question, chat_history=history)
+    assert "cache_hit" not in with_history["metadata_info"]
+    other = "Which package suits a weekend road cyclist?"
+    await agent.process_message(other, chat_history=history)
+    assert agent.response_cache.get(other, agent.pricing_version) is None
@@ -0,0 +1,149 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.src.utils.local_embeddings import HashingEmbeddings
+from backend.src.utils.retrievers import create_retriever
+
+DOCUMENTS = {
+    "pkg-essential": Document(
+        page_content="Essential package: one-time SGD 59, annual SGD 94. "
+        "Tune brakes, gearing, tires, headset, saddle",
+        metadata={"section": "packages"},
+    ),
+    "pkg-premium": Document(
+        page_content="Premium package: one-time SGD 129, annual SGD 206. "
+        "All Advanced + full wash (frame, wheels, bars, saddle, brakes)",
+        metadata={"section": "packages"},
+    ),
+    "addon-inner-tube": Document(
+        page_content="Tire & Tube Services: Inner-tube replacement (standard) SGD 29",
+        metadata={"section": "addons"},
+    ),
+    "policy-turnaround": Document(
+        page_content="Turnaround: ~2-day turnaround on every service",
+        metadata={"section": "policies"},
+    ),
+}
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dimensions=256)
+
+
+@pytest.fixture(params=["chroma", "numpy"])
+def open_retriever(request, tmp_path, embeddings):
+    """Opens a collection of the backend, on the same storage each call"""
+
+    def open_(collection_name="pricing-test"):
+        return create_retriever(
+            request.param,
+            embeddings,
+            persist_directory=str(tmp_path / "chroma"),
+            snapshot_directory=str(tmp_path / "snapshot"),
+            collection_name=collection_name,
+        )
+
+    return open_
+
+
+def upsert_all(retriever, ids=None):
+    ids = ids or list(DOCUMENTS)
+    retriever.upsert(ids, [DOCUMENTS[doc_id] for doc_id in ids])
+
+
+def search(retriever, embeddings, query, k=3, section=None):
+    return retriever.search_by_vector_with_scores(
+        embeddings.embed_query(query), k=k, section=section
+    )
+
+
+def test_upsert_stores_and_replaces_by_id(open_retriever, embeddings):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    assert retriever.get_ids() == set(DOCUMENTS)
+
+    replacement = Document(
+        page_content="Essential package: one-time SGD 65, annual SGD 99. "
+        "Tune brakes, gearing, tires, headset, saddle",
+        metadata={"section": "packages"},
+    )
+    retriever.upsert(["pkg-essential"], [replacement])
+    assert retriever.get_ids() == set(DOCUMENTS)
+    top, _ = search(retriever, embeddings, "essential package tune brakes", k=1)[0]
+    assert top.page_content == replacement.page_content
+
+
+def test_upsert_with_precomputed_vectors(open_retriever, embeddings):
+    retriever = open_retriever()
+    ids = list(DOCUMENTS)
+    vectors = embeddings.embed_documents([DOCUMENTS[i].page_content for i in ids])
+    retriever.upsert(ids, [DOCUMENTS[i] for i in ids], vectors=vectors)
+    top, score = search(
+        retriever, embeddings, DOCUMENTS["addon-inner-tube"].page_content
+    )[0]
+    assert top.page_content == DOCUMENTS["addon-inner-tube"].page_content
+    assert score == pytest.approx(1.0, abs=1e-3)
+
+
+def test_delete_removes_from_ids_and_results(open_retriever, embeddings):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    retriever.delete(["addon-inner-tube"])
+    assert retriever.get_ids() == set(DOCUMENTS) - {"addon-inner-tube"}
+    results = search(retriever, embeddings, "inner-tube replacement", k=4)
+    assert all("Inner-tube" not in doc.page_content for doc, _ in results)
+
+
+def test_search_ranks_by_similarity(open_retriever, embeddings):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    results = search(retriever, embeddings, "premium package full wash", k=3)
+    assert len(results) == 3
+    assert results[0][0].page_content == DOCUMENTS["pkg-premium"].page_content
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_within_section(open_retriever, embeddings):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    results = search(
+        retriever, embeddings, "package annual price", k=3, section="packages"
+    )
+    assert len(results) == 2
+    assert {doc.metadata["section"] for doc, _ in results} == {"packages"}
+    assert search(retriever, embeddings, "package", section="missing") == []
+
+
+def test_empty_store_returns_nothing(open_retriever, embeddings):
+    assert search(open_retriever(), embeddings, "anything") == []
+
+
+def test_reopen_reloads_persisted_state(open_retriever, embeddings):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    retriever.delete(["policy-turnaround"])
+
+    reopened = open_retriever()
+    assert reopened.get_ids() == set(DOCUMENTS) - {"policy-turnaround"}
+    top, _ = search(
+        reopened, embeddings, "inner-tube replacement", k=1, section="addons"
+    )[0]
+    assert top.page_content == DOCUMENTS["addon-inner-tube"].page_content
+    assert top.metadata == {"section": "addons"}
+
+    # The reloaded store still takes updates
+    reopened.upsert(["policy-turnaround"], [DOCUMENTS["policy-turnaround"]])
+    assert reopened.get_ids() == set(DOCUMENTS)
+
+
+def test_sibling_collections_and_drop(open_retriever):
+    retriever = open_retriever()
+    upsert_all(retriever)
+    upsert_all(open_retriever("pricing-old"), ["pkg-essential"])
+
+    assert retriever.sibling_collections() == ["pricing-old"]
+    retriever.drop_collection("pricing-old")
+    assert retriever.sibling_collections() == []
+    assert retriever.get_ids() == set(DOCUMENTS)
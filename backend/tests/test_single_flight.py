@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from backend.src.utils.single_flight import SingleFlight
+
+
+async def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    callers = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == {"key": 3}
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert calls == 1
+    assert results == [("answer", True), ("answer", False), ("answer", False)]
+    stats = flight.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 2
+    assert stats["dedup_ratio"] == pytest.approx(2 / 3)
+    assert stats["in_flight"] == {}
+    assert stats["per_key"] == {"key": {"executions": 1, "coalesced": 2}}
+
+
+async def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        return key
+
+    first = await asyncio.gather(
+        flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b"))
+    )
+    # The key is released once its task finishes
+    again = await flight.do("a", lambda: work("a"))
+
+    assert first == [("a", True), ("b", True)]
+    assert again == ("a", True)
+    assert calls == ["a", "b", "a"]
+
+
+async def test_error_reaches_every_caller_and_key_is_released():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("upstream failed")
+
+    async def ok():
+        return "recovered"
+
+    callers = [asyncio.create_task(flight.do("key", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await flight.do("key", ok) == ("recovered", True)
+
+
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await follower == ("done", False)
+
+
+async def test_per_key_stats_are_bounded():
+    flight = SingleFlight(max_tracked_keys=2)
+
+    async def work():
+        return None
+
+    for key in ("a", "b", "c"):
+        await flight.do(key, work)
+
+    stats = flight.stats()
+    assert list(stats["per_key"]) == ["b", "c"]
+    assert stats["executions"] == 3
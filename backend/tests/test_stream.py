@@ -0,0 +1,29 @@
+async def collect(agent, message, chat_history=None):
+    return [event async for event in agent.stream_message(message, chat_history)]
+
+
+async def test_stream_ends_with_done_envelope(agent):
+    events = await collect(agent, "Which package suits someone who commutes daily?")
+    assert [event["event"] for event in events[:-1]] == ["token"] * (len(events) - 1)
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["data"]["response"] == "".join(e["data"] for e in events[:-1])
+    assert done["data"]["metadata_info"]["model_tier"] in ("fast", "main")
+
+
+async def test_price_lookup_or_routing_error_still_ends_with_done(agent, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("router exploded")
+
+    monkeypatch.setattr(agent.router, "classify", broken)
+    events = await collect(agent, "Which package suits someone who commutes daily?")
+    assert [event["event"] for event in events] == ["done"]
+    assert events[0]["data"]["metadata_info"] == {
+        "requires_human": True,
+        "error": "router exploded",
+    }
+
+    monkeypatch.setattr(agent.price_index, "match", broken)
+    events = await collect(agent, "Essential price?")
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["metadata_info"]["requires_human"]
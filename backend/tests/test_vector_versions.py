@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from backend.src.utils import vector_db
+from backend.src.utils.pricing import DEFAULT_PRICING_DATA
+from backend.src.utils.vector_db import VectorDBManager
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    """Numpy snapshots under a temporary VECTOR_SNAPSHOT_DIR"""
+    directory = tmp_path / "snapshots"
+    directory.mkdir()
+    monkeypatch.setattr(vector_db, "VECTOR_SNAPSHOT_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def manager(snapshots):
+    manager = VectorDBManager(persist_directory=str(snapshots), backend="numpy")
+    yield manager
+    manager.close()
+
+
+def stored(snapshots):
+    return {path.name for path in snapshots.iterdir() if path.name != ".serving"}
+
+
+def lease(snapshots, pid):
+    with open(snapshots / ".serving" / str(pid)) as f:
+        return set(json.load(f))
+
+
+def with_essential_price(one_time):
+    packages = {
+        **DEFAULT_PRICING_DATA["packages"],
+        "Essential": {**DEFAULT_PRICING_DATA["packages"]["Essential"]},
+    }
+    packages["Essential"]["one_time"] = one_time
+    return {**DEFAULT_PRICING_DATA, "packages": packages}
+
+
+def test_legacy_store_is_removed_once_after_activation(manager, snapshots):
+    # The unversioned snapshot of the same embedding model, from before versions
+    legacy = snapshots / manager.collection_name
+    legacy.mkdir()
+    manager.prune()
+    assert legacy.exists()
+
+    manager.initialize_vectorstore()
+    current = manager._collection_for(manager.index.version)
+    assert stored(snapshots) == {current}
+
+    # Written again (say by a worker still on the old release): left alone now
+    legacy.mkdir()
+    manager.prune()
+    assert legacy.exists()
+
+
+def test_versions_leased_by_other_workers_are_kept(manager, snapshots):
+    other = manager._collection_for("other")
+    stale = manager._collection_for("stale")
+    (snapshots / other).mkdir()
+    (snapshots / stale).mkdir()
+    (snapshots / ".serving").mkdir()
+    # The parent process stands in for another live worker
+    (snapshots / ".serving" / str(os.getppid())).write_text(json.dumps([other]))
+
+    manager.initialize_vectorstore()
+
+    current = manager._collection_for(manager.index.version)
+    assert stored(snapshots) == {current, other}
+    assert lease(snapshots, os.getpid()) == {current}
+
+
+def test_previous_version_and_builds_in_progress_stay_leased(manager, snapshots):
+    manager.initialize_vectorstore()
+    first = manager._collection_for(manager.index.version)
+
+    index, _ = manager.build_index(with_essential_price(65))
+    pending, _ = manager.build_index(with_essential_price(69))
+    # Activating one build must not drop the lease of the other
+    manager.activate(index)
+    second = manager._collection_for(index.version)
+    third = manager._collection_for(pending.version)
+    assert lease(snapshots, os.getpid()) == {first, second, third}
+
+    manager.prune()
+    assert stored(snapshots) == {first, second, third}
+
+    manager.activate(pending)
+    manager.prune()
+    assert lease(snapshots, os.getpid()) == {second, third}
+    assert stored(snapshots) == {second, third}
+
+
+def test_failed_build_gives_up_its_lease(manager, snapshots, monkeypatch):
+    manager.initialize_vectorstore()
+    current = manager._collection_for(manager.index.version)
+
+    def fail(store, documents):
+        raise RuntimeError("embedding failed")
+
+    monkeypatch.setattr(manager, "sync_documents", fail)
+    with pytest.raises(RuntimeError):
+        manager.build_index(with_essential_price(65))
+    manager.activate(manager.index)
+    assert lease(snapshots, os.getpid()) == {current}
@@ -11,6 +11,7 @@ function App() {
     const [messages, setMessages] = useState([]);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState('');
+    const [conversationId, setConversationId] = useState(null);
     
     // Ref for the messages container
     const messagesEndRef = useRef(null);
@@ -44,8 +45,11 @@ function App() {
             const response = await axios.post('/chat/', {
                 message: message,
                 agent_id: 1,
+                conversation_id: conversationId,
             });
 
+            setConversationId(response.data.conversation_id);
+
             const botMessage = {
                 id: Date.now() + 1,
                 text: response.data.response,
@@ -243,7 +247,7 @@ function ChatHistoryTab() {
 
         try {
             const response = await axios.get('/chat/history/');
-            setHistory(response.data);
+            setHistory(response.data.items);
         } catch (err) {
             setError('Failed to load chat history. Please try again.');
             console.error('Error fetching chat history:', err);